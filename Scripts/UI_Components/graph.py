@@ -1,22 +1,76 @@
 """
 graph.py: This module provides a GraphManager class for managing and displaying graphs in a tkinter-based application.
 The GraphManager class allows the creation of various types of graphs, such as bar charts, pie charts, line charts,
-scatter plots, histograms, and box plots. It also facilitates updating and displaying graphs based on provided data
- and filters.
+scatter plots, histograms, heatmaps, grouped bar charts and box plots. It also facilitates updating
+and displaying graphs based on provided data and filters.
 """
+import hashlib
 import itertools
+import math
 
 import tkinter as tk
 from tkinter import messagebox
 
-import matplotlib
-import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import seaborn as sns
 
-import pandas as pd
+import numpy as np
+
+from metrics import timed
+from result_cache import ResultCache
+from descriptive import ValueHistogram, is_numeric
+from downsample import plot_values, lttb_indices, density_grid, budget_pairs
+
+POINT_BUDGET = 5000
+DENSITY_BINS = 100
+RENDER_CACHE_ENTRIES = 256
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+class FigurePool:
+    """Class for reusing one Figure and Tk canvas per slot instead of creating them for every chart.
+
+    A slot's figure is cleared for the next chart. It is only replaced when the
+    slot moves to another master frame, and the old figure is then cleared and its widget destroyed.
+    """
+    def __init__(self):
+        """Initialize FigurePool with no slots."""
+        self.slots = {}
+
+    def figure(self, slot, master, figsize):
+        """Return the cleared figure of a slot, creating it and its canvas under master if needed.
+
+        A reused figure keeps the size of its canvas widget.
+        """
+        entry = self.slots.get(slot)
+        if entry is not None and entry['master'] is master and entry['frame'].winfo_exists():
+            entry['figure'].clear()
+            return entry['figure']
+        self.release(slot)
+        frame = tk.Frame(master, bg='#282434')
+        frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        figure = Figure(figsize=figsize)
+        canvas = FigureCanvasTkAgg(figure, master=frame)
+        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.slots[slot] = {'master': master, 'frame': frame, 'figure': figure, 'canvas': canvas}
+        return figure
+
+    def release(self, slot):
+        """Clear a slot's figure and destroy its widgets."""
+        entry = self.slots.pop(slot, None)
+        if entry is None:
+            return
+        entry['figure'].clear()
+        if entry['frame'].winfo_exists():
+            entry['frame'].destroy()
+
+    def stats(self):
+        """Return the number of live pooled figures and the bytes held by their Agg buffers."""
+        buffer_bytes = 0
+        for entry in self.slots.values():
+            width, height = entry['canvas'].get_width_height()
+            buffer_bytes += width * height * 4
+        return {'figures': len(self.slots), 'buffer_bytes': buffer_bytes}
 
 class GraphManager:
     """Class for managing and displaying graphs."""
@@ -36,6 +90,10 @@ class GraphManager:
         self.view = view
         self.sidebar = view.sidebar
         self.controller = controller
+        self.point_budget = POINT_BUDGET
+        self.render_cache = ResultCache(RENDER_CACHE_ENTRIES, RENDER_CACHE_BYTES)
+        self.figure_pool = FigurePool()
+        self.stats_text = None
 
     def create_graph_area(self):
         """Create the area for displaying graphs."""
@@ -58,6 +116,7 @@ class GraphManager:
         self.category_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.fig_category = Figure(figsize=(6, 3), facecolor='#282434')
         self.ax_category = self.fig_category.add_subplot(111)
+        self.category_bars = None
         self.ax_category.tick_params(colors='white')
         for spine in self.ax_category.spines.values():
             spine.set_edgecolor('white')
@@ -71,6 +130,7 @@ class GraphManager:
         self.gender_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.fig_gender = Figure(figsize=(6, 3), facecolor='#282434')
         self.ax_gender = self.fig_gender.add_subplot(111)
+        self.gender_pie = None
         self.ax_gender.tick_params(colors='white')
         for spine in self.ax_gender.spines.values():
             spine.set_edgecolor('white')
@@ -84,6 +144,7 @@ class GraphManager:
         self.shipping_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.fig_shipping = Figure(figsize=(6, 3), facecolor='#282434')
         self.axs_shipping = self.fig_shipping.add_subplot(111)
+        self.shipping_lines = None
         self.axs_shipping.tick_params(colors='white')
         for spine in self.axs_shipping.spines.values():
             spine.set_edgecolor('white')
@@ -97,6 +158,8 @@ class GraphManager:
         self.top_items_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.fig_top_items = Figure(figsize=(6, 3), facecolor='#282434')
         self.ax_top_items = self.fig_top_items.add_subplot(111)
+        self.bars = None
+        self.top_item_labels = None
         self.ax_top_items.tick_params(colors='white')
         for spine in self.ax_top_items.spines.values():
             spine.set_edgecolor('white')
@@ -107,144 +170,250 @@ class GraphManager:
 
     def on_bar_click(self, event):
         """Handle the click event on a bar in the top items graph."""
-        if event.inaxes == self.ax_top_items:
+        if event.inaxes == self.ax_top_items and self.bars:
+            bar_index = int(round(event.xdata))
+            if not 0 <= bar_index < len(self.bars):
+                return
             for obj in self.bars:
-                if isinstance(obj, matplotlib.patches.Rectangle):
-                    obj.set_facecolor('lightblue')
-            bar_index = int(event.xdata)
+                obj.set_facecolor('lightblue')
             selected_bar = self.bars[bar_index]
             selected_bar.set_facecolor('orange')
-            self.canvas_top_items.draw()
+            self.canvas_top_items.draw_idle()
             item_name = self.top_items[bar_index]
             self.display_item_details(item_name)
 
     def display_item_details(self, item_name):
         """Display detailed information about the selected item."""
-        category_filters = [option for var, option in zip(self.sidebar.category_vars, self.sidebar.category_options) if var.get()]
-        size_filters = [option for var, option in zip(self.sidebar.size_vars, self.sidebar.size_options) if var.get()]
-        location = self.sidebar.location_var.get()
-        season = self.sidebar.season_var.get()
-        filtered_data = self.model.filter_data(category_filters, size_filters, location, season)
-        item_data = filtered_data[filtered_data['Item Purchased'] == item_name]
-        average_age = item_data['Age'].mean()
-        average_purchase_amount = item_data['Purchase Amount (USD)'].mean()
-        average_review_rating = item_data['Review Rating'].mean()
-        popular_colors = item_data['Color'].value_counts(normalize=True) * 100
-        popular_colors = popular_colors.head(5)
-        popular_colors_text = ', '.join(f"{color} ({percentage:.1f}%)" for color, percentage in popular_colors.items())
-        popular_sizes = item_data['Size'].value_counts(normalize=True) * 100
-        popular_sizes = popular_sizes.head(5)
-        popular_sizes_text = ', '.join(f"{size} ({percentage:.1f}%)" for size, percentage in popular_sizes.items())
-        subscription_percentage = (item_data['Subscription Status'] == 'Yes').mean() * 100
-        discount_applied = item_data['Discount Applied'].map({'Yes': 1, 'No': 0}).sum() / len(item_data['Discount Applied']) * 100
-        insight_text = f"Average Age: {average_age:.1f}\n"
-        insight_text += f"Average Purchase Amount: ${average_purchase_amount:.2f}\n"
-        insight_text += f"Average Review Rating: {average_review_rating:.1f}\n"
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('item_details', lambda: self.model.item_details(item_name, *filters),
+                             self.show_item_details)
+
+    def submit_for_page(self, channel, compute, callback):
+        """Run compute in the background and deliver its result only if the page is still shown."""
+        frame = self.middle_frame
+
+        def deliver(result):
+            if self.middle_frame is frame:
+                callback(result)
+        self.controller.executor.submit(channel, compute, deliver)
+
+    @timed('graph.show_item_details')
+    def show_item_details(self, details):
+        """Show the computed insights for the selected item in the bottom label."""
+        popular_colors_text = ', '.join(f"{color} ({percentage:.1f}%)"
+                                        for color, percentage in details['popular_colors'].items())
+        popular_sizes_text = ', '.join(f"{size} ({percentage:.1f}%)"
+                                       for size, percentage in details['popular_sizes'].items())
+        insight_text = f"Average Age: {details['average_age']:.1f}\n"
+        insight_text += f"Average Purchase Amount: ${details['average_purchase_amount']:.2f}\n"
+        insight_text += f"Average Review Rating: {details['average_review_rating']:.1f}\n"
         insight_text += f"Popular Colors: {popular_colors_text}\n"
         insight_text += f"Popular Sizes: {popular_sizes_text}\n"
-        insight_text += f"Subscription Percentage: {subscription_percentage:.1f}%\n"
-        insight_text += f"Average Discount Applied: {discount_applied:.1f}%\n"
+        insight_text += f"Subscription Percentage: {details['subscription_percentage']:.1f}%\n"
+        insight_text += f"Average Discount Applied: {details['discount_applied']:.1f}%\n"
         self.bottom_label.config(text=insight_text, justify=tk.LEFT)
 
+    def render_key(self, canvas, chart, data):
+        """Return the render cache key of a chart: a digest of its data plus the canvas size."""
+        content = repr((chart, list(data.index), [round(float(value), 6) for value in data.values]))
+        return (hashlib.sha1(content.encode('utf-8')).hexdigest(), canvas.get_width_height(),
+                canvas.figure.dpi)
+
+    def paint(self, canvas, chart, data):
+        """Paint a chart from its cached Agg pixels, drawing and caching it when the state is new.
+
+        The artists are always updated first, so a later full redraw (e.g. on resize) matches.
+        """
+        key = self.render_key(canvas, chart, data)
+        pixels = self.render_cache.get(key)
+        if pixels is not None:
+            buffer = np.asarray(canvas.get_renderer().buffer_rgba())
+            if buffer.shape == pixels.shape:
+                np.copyto(buffer, pixels)
+                canvas.blit()
+                return
+        canvas.draw()
+        self.render_cache.put(key, np.array(canvas.buffer_rgba()))
+
+    @timed('graph.update_category_graph')
     def update_category_graph(self, category_counts):
         """Update the category graph based on the provided category counts."""
-        self.ax_category.clear()
-        category_counts.plot(kind='bar', ax=self.ax_category, color=['skyblue', 'pink', 'lightgreen', 'lightcoral'], edgecolor='black')
-        self.ax_category.set_ylabel('Popularity (%)', color='white')
-        self.ax_category.set_title('Popularity of Each Category', color='white')
-        self.ax_category.tick_params(axis='x', colors='white')
-        self.ax_category.tick_params(axis='y', colors='white')
-        self.ax_category.set_xticklabels(category_counts.index, rotation=0)
-        self.ax_category.grid(False, axis='x')
-        self.ax_category.grid(axis='y')
-        self.canvas_category.draw()
+        if self.category_bars is not None and len(self.category_bars) == len(category_counts):
+            for bar, value in zip(self.category_bars, category_counts.values):
+                bar.set_height(value)
+            self.ax_category.set_xticklabels(category_counts.index, rotation=0)
+            self.ax_category.relim()
+            self.ax_category.autoscale_view()
+        else:
+            self.ax_category.clear()
+            colors = ['skyblue', 'pink', 'lightgreen', 'lightcoral']
+            self.category_bars = self.ax_category.bar(range(len(category_counts)),
+                                                      category_counts.values, width=0.5,
+                                                      color=colors, edgecolor='black')
+            self.ax_category.set_ylabel('Popularity (%)', color='white')
+            self.ax_category.set_title('Popularity of Each Category', color='white')
+            self.ax_category.tick_params(axis='x', colors='white')
+            self.ax_category.tick_params(axis='y', colors='white')
+            self.ax_category.set_xticks(range(len(category_counts)))
+            self.ax_category.set_xticklabels(category_counts.index, rotation=0)
+            self.ax_category.grid(False, axis='x')
+            self.ax_category.grid(axis='y')
+        self.paint(self.canvas_category, 'category', category_counts)
 
+    @timed('graph.update_gender_graph')
     def update_gender_graph(self, gender_counts):
         """Update the gender graph based on the provided gender counts."""
-        self.ax_gender.clear()
-        gender_counts.plot(kind='pie', ax=self.ax_gender, autopct='%1.1f%%', colors=['skyblue', 'pink'], textprops={'color': 'white'})
-        self.ax_gender.set_title('Frequency of Gender', color='white')
-        self.ax_gender.set_ylabel('')
-        self.ax_gender.tick_params(axis='x', colors='white', pad=50)
-        self.ax_gender.tick_params(axis='y', colors='white')
-        self.ax_gender.set_facecolor('#282434')
-        self.canvas_gender.draw()
+        if self.gender_pie is not None and len(self.gender_pie[0]) == len(gender_counts):
+            self.move_pie_wedges(gender_counts)
+        else:
+            self.ax_gender.clear()
+            self.gender_pie = None
+            if len(gender_counts):
+                self.gender_pie = self.ax_gender.pie(gender_counts.values,
+                                                     labels=gender_counts.index, autopct='%1.1f%%',
+                                                     colors=['skyblue', 'pink'],
+                                                     textprops={'color': 'white'})
+            self.ax_gender.set_title('Frequency of Gender', color='white')
+            self.ax_gender.set_ylabel('')
+            self.ax_gender.tick_params(axis='x', colors='white', pad=50)
+            self.ax_gender.tick_params(axis='y', colors='white')
+            self.ax_gender.set_facecolor('#282434')
+        self.paint(self.canvas_gender, 'gender', gender_counts)
+
+    def move_pie_wedges(self, gender_counts):
+        """Move the existing gender pie wedges and labels to new proportions."""
+        wedges, texts, autotexts = self.gender_pie
+        fractions = gender_counts.values / gender_counts.values.sum()
+        theta1 = 0.0
+        for wedge, text, autotext, fraction, label in zip(wedges, texts, autotexts, fractions,
+                                                          gender_counts.index):
+            theta2 = theta1 + fraction * 360
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            angle = math.radians((theta1 + theta2) / 2)
+            x_position, y_position = math.cos(angle), math.sin(angle)
+            text.set_position((1.1 * x_position, 1.1 * y_position))
+            text.set_horizontalalignment('left' if x_position > 0 else 'right')
+            text.set_text(label)
+            autotext.set_position((0.6 * x_position, 0.6 * y_position))
+            autotext.set_text(f'{fraction * 100:.1f}%')
+            theta1 = theta2
 
+    @timed('graph.update_shipping_graph')
     def update_shipping_graph(self, shipping_counts):
         """Update the shipping graph based on the provided shipping counts."""
-        self.axs_shipping.clear()
-        colors = itertools.cycle(['lightblue', 'lightgreen', 'lightcoral'])
-        for idx, (category, count) in enumerate(shipping_counts.items()):
-            color = next(colors)
-            self.axs_shipping.plot(idx, count, marker='o', color=color, linestyle='-')
-        self.axs_shipping.set_title('Shipping Type', color='white')
-        self.axs_shipping.set_ylabel('Frequency', color='white')
-        self.axs_shipping.tick_params(axis='x', colors='white')
-        self.axs_shipping.tick_params(axis='y', colors='white')
-        min_value = (shipping_counts.min() // 10) * 10
-        max_value = (shipping_counts.max() // 10 + 1) * 10
-        self.axs_shipping.set_yticks(range(min_value, max_value + 1, 10))
-        self.axs_shipping.set_yticklabels([str(y) for y in range(min_value, max_value + 1, 10)], color='white')
-        self.axs_shipping.set_xticks(range(len(shipping_counts)))
+        if self.shipping_lines is not None and len(self.shipping_lines) == len(shipping_counts):
+            for line, count in zip(self.shipping_lines, shipping_counts.values):
+                line.set_ydata([count])
+        else:
+            self.axs_shipping.clear()
+            colors = itertools.cycle(['lightblue', 'lightgreen', 'lightcoral'])
+            self.shipping_lines = []
+            for idx, count in enumerate(shipping_counts.values):
+                color = next(colors)
+                self.shipping_lines.extend(self.axs_shipping.plot(idx, count, marker='o',
+                                                                  color=color, linestyle='-'))
+            self.axs_shipping.set_title('Shipping Type', color='white')
+            self.axs_shipping.set_ylabel('Frequency', color='white')
+            self.axs_shipping.tick_params(axis='x', colors='white')
+            self.axs_shipping.tick_params(axis='y', colors='white')
+            self.axs_shipping.set_xticks(range(len(shipping_counts)))
+            self.axs_shipping.grid(False, axis='x')
+            self.axs_shipping.grid(axis='y')
+        if len(shipping_counts):
+            min_value = (int(shipping_counts.min()) // 10) * 10
+            max_value = (int(shipping_counts.max()) // 10 + 1) * 10
+            self.axs_shipping.set_yticks(range(min_value, max_value + 1, 10))
+            self.axs_shipping.set_yticklabels([str(y) for y in range(min_value, max_value + 1, 10)],
+                                              color='white')
+            self.axs_shipping.set_ylim(min_value - 5, max_value + 5)
         self.axs_shipping.set_xticklabels(shipping_counts.index, rotation=0)
-        self.axs_shipping.grid(False, axis='x')
-        self.axs_shipping.grid(axis='y')
-        self.axs_shipping.set_ylim(min_value - 5, max_value + 5)
-        self.canvas_shipping.draw()
+        self.paint(self.canvas_shipping, 'shipping', shipping_counts)
 
+    @timed('graph.update_top_items_graph')
     def update_top_items_graph(self, top_items):
         """Update the top items graph based on the provided top items data."""
-        self.ax_top_items.clear()
         total_purchases = top_items.sum()
         top_items_percentage = (top_items / total_purchases) * 100
         top_items_percentage = top_items_percentage.head(10)
         colors = list(mcolors.TABLEAU_COLORS.values())
-        bars = top_items_percentage.plot(kind='bar', ax=self.ax_top_items, color=colors, edgecolor='black')
-        self.ax_top_items.set_ylabel('Percentage of Purchases (%)', color='white')
-        self.ax_top_items.set_title('Top 10 Items Purchased', color='white')
-        self.ax_top_items.tick_params(axis='x', colors='white')
-        self.ax_top_items.tick_params(axis='y', colors='white')
+        if self.bars is not None and len(self.bars) == len(top_items_percentage):
+            for bar, label, color, value in zip(self.bars, self.top_item_labels, colors,
+                                                top_items_percentage.values):
+                bar.set_height(value)
+                bar.set_facecolor(color)
+                label.set_y(value + 1)
+                label.set_text(f'{value:.1f}%')
+            self.ax_top_items.relim()
+            self.ax_top_items.autoscale_view()
+        else:
+            self.ax_top_items.clear()
+            self.bars = self.ax_top_items.bar(range(len(top_items_percentage)),
+                                              top_items_percentage.values, width=0.5,
+                                              color=colors[:len(top_items_percentage)],
+                                              edgecolor='black').patches
+            self.ax_top_items.set_ylabel('Percentage of Purchases (%)', color='white')
+            self.ax_top_items.set_title('Top 10 Items Purchased', color='white')
+            self.ax_top_items.tick_params(axis='x', colors='white')
+            self.ax_top_items.tick_params(axis='y', colors='white')
+            self.ax_top_items.set_xticks(range(len(top_items_percentage)))
+            self.top_item_labels = [self.ax_top_items.text(i, value + 1, f'{value:.1f}%',
+                                                           color='black', ha='center')
+                                    for i, value in enumerate(top_items_percentage)]
+            self.ax_top_items.grid(False, axis='x')
+            self.ax_top_items.grid(axis='y')
         self.ax_top_items.set_xticklabels(top_items_percentage.index, rotation=45, ha='right')
-        for i, value in enumerate(top_items_percentage):
-            self.ax_top_items.text(i, value + 1, f'{value:.1f}%', color='black', ha='center')
-        max_value = int(max(top_items_percentage))
-        y_ticks = list(range(0, max_value + 10, 5))
-        self.ax_top_items.set_yticks(y_ticks)
-        self.ax_top_items.grid(False, axis='x')
-        self.ax_top_items.grid(axis='y')
-        self.canvas_top_items.draw()
+        if len(top_items_percentage):
+            max_value = int(max(top_items_percentage))
+            self.ax_top_items.set_yticks(list(range(0, max_value + 10, 5)))
+        self.paint(self.canvas_top_items, 'top_items', top_items_percentage)
         self.top_items = top_items_percentage.index.tolist()
-        self.bars = bars.get_children()
-        self.canvas_top_items.mpl_connect('button_press_event', self.on_bar_click)
 
+    def explorer_figure(self, figsize):
+        """Return the reused Attribute Explorer figure, cleared, with a single Axes."""
+        fig = self.figure_pool.figure('explorer', self.middle_frame, figsize)
+        return fig, fig.add_subplot(111)
+
+    @timed('graph.display_graph_and_stats')
     def display_graph_and_stats(self, fig, stats):
         """Display the graph and its descriptive statistics."""
-        graph_frame = tk.Frame(self.view.graph_manager.middle_frame, bg='#282434')
-        graph_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        stats_frame = tk.Frame(self.view.graph_manager.middle_frame, bg='#282434')
-        stats_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        canvas = FigureCanvasTkAgg(fig, master=graph_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        stats_text = tk.Text(stats_frame, wrap=tk.WORD, bg='black', fg='white', font=('Courier', 10))
-        stats_text.pack(expand=True, fill=tk.BOTH)
-        stats_text.delete('1.0', tk.END)
-        stats_text.insert(tk.END, "Descriptive Statistics:\n\n")
+        fig.canvas.draw()
+        if self.stats_text is None or self.stats_text.master.master is not self.middle_frame:
+            stats_frame = tk.Frame(self.middle_frame, bg='#282434')
+            stats_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            self.stats_text = tk.Text(stats_frame, wrap=tk.WORD, bg='black', fg='white',
+                                      font=('Courier', 10))
+            self.stats_text.pack(expand=True, fill=tk.BOTH)
+        self.stats_text.delete('1.0', tk.END)
+        self.stats_text.insert(tk.END, "Descriptive Statistics:\n\n")
         for stat, value in stats.items():
-            stats_text.insert(tk.END, f"{stat}: {value}\n")
-
-    def show_bar_chart(self, data, x_title=None, y_title=None):
-        """Show a bar chart based on the provided data."""
-        data = self.apply_sidebar_filters(data)
-        self.clear_middle_frame()
-        if isinstance(data, pd.Series):
-            data = data.value_counts()
-        elif isinstance(data, pd.DataFrame):
-            data = data[data.columns[0]].value_counts()
-        else:
+            self.stats_text.insert(tk.END, f"{stat}: {value}\n")
+
+    def show_bar_chart(self, columns, x_title=None, y_title=None):
+        """Show a bar chart of the values of the first of the given columns."""
+        if not columns:
             messagebox.showerror("Error", "Invalid data type for bar chart.")
             return
-        fig, ax = plt.subplots(figsize=(8, 6))
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer', lambda: self.prepare_counts(columns[0], filters),
+                             lambda result: self.render_bar_chart(*result, x_title, y_title))
+
+    @timed('graph.prepare_counts')
+    def prepare_counts(self, column, filters):
+        """Query a column for the filtered rows and count its values, off the Tk thread."""
+        data = self.model.value_counts(self.apply_sidebar_filters([column], filters))
+        return data, data.describe()
+
+    @timed('graph.prepare_rows')
+    def prepare_rows(self, columns, filters, attribute=None):
+        """Query the columns for the filtered rows and describe them (or one), off the Tk thread."""
+        stats = self.model.describe_columns([attribute] if attribute else columns, *filters)
+        return self.apply_sidebar_filters(columns, filters), stats
+
+    @timed('graph.render_bar_chart')
+    def render_bar_chart(self, data, stats, x_title, y_title):
+        """Draw a bar chart of precomputed value counts."""
+        fig, ax = self.explorer_figure((8, 6))
         num_bars = min(len(data.index), 10)
         ax.bar(data.index[:num_bars], data.values[:num_bars], color='skyblue')
         if x_title:
@@ -258,100 +427,247 @@ class GraphManager:
         ax.set_xticklabels(data.index[:num_bars], rotation=45, ha='right')
         ax.grid(axis='y', color='grey', linestyle='--')
         fig.tight_layout()
-        self.display_graph_and_stats(fig, data.describe())
-
-    def show_pie_chart(self, data, title=None):
-        """Show a pie chart based on the provided data."""
-        data = self.apply_sidebar_filters(data)
-        self.clear_middle_frame()
-        if isinstance(data, pd.Series):
-            data = data.value_counts()
-        elif isinstance(data, pd.DataFrame):
-            data = data[data.columns[0]].value_counts()
-        else:
+        self.display_graph_and_stats(fig, stats)
+
+    def show_pie_chart(self, columns, title=None):
+        """Show a pie chart of the values of the first of the given columns."""
+        if not columns:
             messagebox.showerror("Error", "Invalid data type for pie chart.")
             return
-        fig, ax = plt.subplots(figsize=(8, 6))
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer', lambda: self.prepare_counts(columns[0], filters),
+                             lambda result: self.render_pie_chart(*result, title))
+
+    @timed('graph.render_pie_chart')
+    def render_pie_chart(self, data, stats, title):
+        """Draw a pie chart of precomputed value counts."""
+        fig, ax = self.explorer_figure((8, 6))
         ax.pie(data.values, labels=data.index, autopct='%1.1f%%', colors=['skyblue', 'pink', 'lightgreen', 'gold'])
         if title:
             ax.set_title(title, fontsize=14, color='black')
         ax.axis('equal')
         fig.tight_layout()
-        self.display_graph_and_stats(fig, data.describe())
+        self.display_graph_and_stats(fig, stats)
         if len(data.index) > 1:
             ax.legend(data.index)
 
-    def show_line_chart(self, data, x_title=None, y_title=None):
-        """Show a line chart based on the provided data."""
-        data = self.apply_sidebar_filters(data)
-        self.clear_middle_frame()
-        if isinstance(data, pd.DataFrame):
-            x_label = data.columns[0]
-            y_label = data.columns[1]
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.plot(data[x_label], data[y_label], color='skyblue', label=f'{x_label} vs {y_label}')
-            if x_title:
-                ax.set_xlabel(x_title, fontsize=12, color='black')
-            if y_title:
-                ax.set_ylabel(y_title, fontsize=12, color='black')
-            ax.set_title("Line Chart", fontsize=14, color='black')
-            ax.tick_params(axis='x', colors='black')
-            ax.tick_params(axis='y', colors='black')
-            ax.grid(axis='both', color='grey', linestyle='--')
-            ax.legend()
-            fig.tight_layout()
-            self.display_graph_and_stats(fig, data.describe())
-        else:
+    def show_line_chart(self, columns, x_title=None, y_title=None):
+        """Show a line chart of the second of the given columns against the first."""
+        if len(columns) != 2:
             messagebox.showerror("Error", "Invalid data type for line chart.")
+            return
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer', lambda: self.prepare_line(columns, filters),
+                             lambda result: self.render_line_chart(*result, x_title, y_title))
 
-    def show_scatter_plot(self, data, x_title=None, y_title=None):
-        """Show a scatter plot based on the provided data."""
-        data = self.apply_sidebar_filters(data)
-        self.clear_middle_frame()
-        if isinstance(data, pd.DataFrame) and len(data.columns) == 2:
-            x_label, y_label = data.columns
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.scatter(data[x_label], data[y_label], color='skyblue', label=f'{x_label} vs {y_label}')
-            if x_title:
-                ax.set_xlabel(x_title, fontsize=12, color='black')
-            if y_title:
-                ax.set_ylabel(y_title, fontsize=12, color='black')
-            ax.set_title("Scatter Plot", fontsize=14, color='black')
-            ax.tick_params(axis='x', colors='black')
-            ax.tick_params(axis='y', colors='black')
-            ax.grid(axis='both', color='grey', linestyle='--')
-            ax.legend()
-            fig.tight_layout()
-            self.display_graph_and_stats(fig, data.describe())
-        else:
+    @timed('graph.prepare_line')
+    def prepare_line(self, columns, filters):
+        """Query and describe the columns, then downsample them to the point budget with LTTB."""
+        data, stats = self.prepare_rows(columns, filters)
+        if len(data) > self.point_budget:
+            x_values = plot_values(data[data.columns[0]])
+            y_values = plot_values(data[data.columns[1]])
+            data = data.iloc[lttb_indices(x_values, y_values, self.point_budget)]
+        return data, stats
+
+    @timed('graph.render_line_chart')
+    def render_line_chart(self, data, stats, x_title, y_title):
+        """Draw a line chart of the first two columns of the filtered data."""
+        x_label = data.columns[0]
+        y_label = data.columns[1]
+        fig, ax = self.explorer_figure((8, 6))
+        ax.plot(data[x_label], data[y_label], color='skyblue', label=f'{x_label} vs {y_label}')
+        if x_title:
+            ax.set_xlabel(x_title, fontsize=12, color='black')
+        if y_title:
+            ax.set_ylabel(y_title, fontsize=12, color='black')
+        ax.set_title("Line Chart", fontsize=14, color='black')
+        ax.tick_params(axis='x', colors='black')
+        ax.tick_params(axis='y', colors='black')
+        ax.grid(axis='both', color='grey', linestyle='--')
+        ax.legend()
+        fig.tight_layout()
+        self.display_graph_and_stats(fig, stats)
+
+    def show_scatter_plot(self, columns, x_title=None, y_title=None):
+        """Show a scatter plot of two columns."""
+        if len(columns) != 2:
             messagebox.showerror("Error", "Invalid data type for scatter plot.")
+            return
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer', lambda: self.prepare_scatter(columns, filters),
+                             lambda result: self.render_scatter_plot(*result, x_title, y_title))
+
+    @timed('graph.prepare_scatter')
+    def prepare_scatter(self, columns, filters):
+        """Filter and describe the data, reducing it above the point budget.
+
+        Two numeric columns become a density grid, other pairs at most point_budget counted pairs.
+        """
+        data, stats = self.prepare_rows(columns, filters)
+        density = None
+        if len(data) > self.point_budget:
+            x_data, y_data = data[data.columns[0]], data[data.columns[1]]
+            if is_numeric(x_data) and is_numeric(y_data):
+                density = ('grid',) + density_grid(x_data.to_numpy(dtype=np.float64),
+                                                   y_data.to_numpy(dtype=np.float64), DENSITY_BINS)
+            else:
+                density = ('pairs',) + budget_pairs(x_data, y_data, self.point_budget, DENSITY_BINS)
+        return data.columns, stats, density, data if density is None else None
 
-    def show_histogram(self, data, x_title=None, y_title=None):
-        """Show a histogram based on the provided data."""
-        data = self.apply_sidebar_filters(data)
-        self.clear_middle_frame()
-        if isinstance(data, pd.Series):
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.hist(data, bins=10, color='skyblue', edgecolor='black')
-            if x_title:
-                ax.set_xlabel(x_title, fontsize=12, color='black')
-            if y_title:
-                ax.set_ylabel(y_title, fontsize=12, color='black')
-            ax.set_title("Histogram", fontsize=14, color='black')
-            ax.tick_params(axis='x', colors='black')
-            ax.tick_params(axis='y', colors='black')
-            ax.grid(axis='y', color='grey', linestyle='--')
-            fig.tight_layout(pad=3.0)
-            self.display_graph_and_stats(fig, data.describe())
+    @timed('graph.render_scatter_plot')
+    def render_scatter_plot(self, columns, stats, density, data, x_title, y_title):
+        """Draw a scatter plot of the filtered data, or its density when there are too many."""
+        x_label, y_label = columns
+        fig, ax = self.explorer_figure((8, 6))
+        if density is None:
+            ax.scatter(data[x_label], data[y_label], color='skyblue', label=f'{x_label} vs {y_label}')
+        elif density[0] == 'grid':
+            _, counts, x_edges, y_edges = density
+            mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap='Blues',
+                                 label=f'{x_label} vs {y_label}')
+            fig.colorbar(mesh, ax=ax, label='Count')
         else:
+            _, x_values, y_values, counts = density
+            sizes = 20 + 280 * counts / counts.max()
+            ax.scatter(x_values, y_values, s=sizes, color='skyblue', edgecolor='black',
+                       label=f'{x_label} vs {y_label} (size = count)')
+        if x_title:
+            ax.set_xlabel(x_title, fontsize=12, color='black')
+        if y_title:
+            ax.set_ylabel(y_title, fontsize=12, color='black')
+        ax.set_title("Scatter Plot", fontsize=14, color='black')
+        ax.tick_params(axis='x', colors='black')
+        ax.tick_params(axis='y', colors='black')
+        ax.grid(axis='both', color='grey', linestyle='--')
+        ax.legend()
+        fig.tight_layout()
+        self.display_graph_and_stats(fig, stats)
+
+    def show_histogram(self, columns, x_title=None, y_title=None):
+        """Show a histogram of one column."""
+        if len(columns) != 1:
             messagebox.showerror("Error", "Invalid data type for histogram.")
+            return
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer', lambda: self.prepare_rows(columns, filters),
+                             lambda result: self.render_histogram(*result, x_title, y_title))
+
+    @timed('graph.render_histogram')
+    def render_histogram(self, data, stats, x_title, y_title):
+        """Draw a histogram of the filtered series."""
+        fig, ax = self.explorer_figure((10, 6))
+        ax.hist(data, bins=10, color='skyblue', edgecolor='black')
+        if x_title:
+            ax.set_xlabel(x_title, fontsize=12, color='black')
+        if y_title:
+            ax.set_ylabel(y_title, fontsize=12, color='black')
+        ax.set_title("Histogram", fontsize=14, color='black')
+        ax.tick_params(axis='x', colors='black')
+        ax.tick_params(axis='y', colors='black')
+        ax.grid(axis='y', color='grey', linestyle='--')
+        fig.tight_layout(pad=3.0)
+        self.display_graph_and_stats(fig, stats)
+
+    def show_heatmap(self, row_attribute, column_attribute):
+        """Show a heatmap of how often each pair of values of two attributes occurs."""
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer',
+                             lambda: self.prepare_joint(row_attribute, column_attribute, filters),
+                             lambda result: self.render_heatmap(*result, row_attribute,
+                                                                column_attribute))
+
+    def show_grouped_bar_chart(self, group_attribute, bar_attribute):
+        """Show the counts of one attribute's values as bars grouped by the values of another."""
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer',
+                             lambda: self.prepare_joint(group_attribute, bar_attribute, filters),
+                             lambda result: self.render_grouped_bar_chart(*result, group_attribute,
+                                                                          bar_attribute))
+
+    @timed('graph.prepare_joint')
+    def prepare_joint(self, row_attribute, column_attribute, filters):
+        """Look up the crosstab of two attributes and describe both, off the Tk thread."""
+        table = self.model.joint_table(row_attribute, column_attribute, *filters)
+        return table.to_frame(), self.model.describe_columns([row_attribute, column_attribute],
+                                                             *filters)
+
+    @timed('graph.render_heatmap')
+    def render_heatmap(self, frame, stats, row_attribute, column_attribute):
+        """Draw a crosstab of counts as a heatmap."""
+        fig, ax = self.explorer_figure((8, 6))
+        image = ax.imshow(frame.to_numpy(), cmap='Blues', aspect='auto')
+        fig.colorbar(image, ax=ax, label='Count')
+        ax.set_xticks(range(len(frame.columns)))
+        ax.set_xticklabels(frame.columns, rotation=45, ha='right')
+        ax.set_yticks(range(len(frame.index)))
+        ax.set_yticklabels(frame.index)
+        ax.set_xlabel(column_attribute, fontsize=12, color='black')
+        ax.set_ylabel(row_attribute, fontsize=12, color='black')
+        ax.set_title("Heatmap", fontsize=14, color='black')
+        ax.tick_params(axis='x', colors='black')
+        ax.tick_params(axis='y', colors='black')
+        fig.tight_layout()
+        self.display_graph_and_stats(fig, stats)
 
-    def show_box_plot(self, attribute, data, x_title=None, y_title=None):
-        """Show a box plot based on the provided attribute and data."""
-        data = self.apply_sidebar_filters(data)
-        self.clear_middle_frame()
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.boxplot(x=data[attribute], ax=ax, color='skyblue')
+    @timed('graph.render_grouped_bar_chart')
+    def render_grouped_bar_chart(self, frame, stats, group_attribute, bar_attribute):
+        """Draw a crosstab of counts as bars grouped by its rows, one bar per column."""
+        fig, ax = self.explorer_figure((10, 6))
+        width = 0.8 / max(len(frame.columns), 1)
+        positions = np.arange(len(frame.index))
+        for offset, column in enumerate(frame.columns):
+            ax.bar(positions + (offset - (len(frame.columns) - 1) / 2) * width,
+                   frame[column].to_numpy(),
+                   width=width, label=str(column))
+        ax.set_xticks(positions)
+        ax.set_xticklabels(frame.index, rotation=45, ha='right')
+        ax.set_xlabel(group_attribute, fontsize=12, color='black')
+        ax.set_ylabel("Count", fontsize=12, color='black')
+        ax.set_title("Grouped Bar Chart", fontsize=14, color='black')
+        ax.tick_params(axis='x', colors='black')
+        ax.tick_params(axis='y', colors='black')
+        ax.grid(axis='y', color='grey', linestyle='--')
+        ax.legend(title=bar_attribute, fontsize=8)
+        fig.tight_layout()
+        self.display_graph_and_stats(fig, stats)
+
+    def show_box_plot(self, attribute, x_title=None, y_title=None, by=None):
+        """Show a box plot of an attribute, one box per value of another attribute if given."""
+        filters = self.sidebar.get_filters()
+        self.submit_for_page('explorer', lambda: self.prepare_box_plot(attribute, filters, by),
+                             lambda result: self.render_box_plot(*result, x_title, y_title))
+
+    @timed('graph.prepare_box_plot')
+    def prepare_box_plot(self, attribute, filters, by=None):
+        """Describe the attribute and look up its quartiles, keeping rows only for non-numeric ones.
+
+        A numeric attribute split by a non-numeric one gets a box per value, from their joint table.
+        """
+        summary = self.model.column_summary(attribute, *filters)
+        if not summary.numeric:
+            return self.prepare_rows([attribute], filters) + (None,)
+        if by is None or self.model.column_summary(by, *filters).numeric \
+                or not (self.model.has_joint_table(attribute) and self.model.has_joint_table(by)):
+            return None, summary.describe(), [summary.box_stats()]
+        table = self.model.joint_table(attribute, by, *filters)
+        counts = table.dense()[:-1]
+        boxes = [ValueHistogram(table.row_labels, counts[:, position], True, name=label).box_stats()
+                 for position, label in enumerate(table.column_labels) if counts[:, position].any()]
+        return None, self.model.describe_columns([attribute, by], *filters), boxes
+
+    @timed('graph.render_box_plot')
+    def render_box_plot(self, data, stats, box_stats, x_title, y_title):
+        """Draw a box plot of an attribute of the filtered data, from its quartiles when numeric."""
+        fig, ax = self.explorer_figure((8, 6))
+        if box_stats is None:
+            import seaborn as sns  # pylint: disable=import-outside-toplevel
+            sns.boxplot(x=data, ax=ax, color='skyblue')
+        else:
+            ax.bxp(box_stats, vert=False, patch_artist=True, widths=0.6,
+                   boxprops={'facecolor': 'skyblue'}, medianprops={'color': 'black'})
+            if len(box_stats) == 1:
+                ax.set_yticks([])
         if x_title:
             ax.set_xlabel(x_title, fontsize=12, color='black')
         if y_title:
@@ -361,20 +677,8 @@ class GraphManager:
         ax.tick_params(axis='y', colors='black')
         ax.grid(axis='y', color='grey', linestyle='--')
         fig.tight_layout()
-        self.display_graph_and_stats(fig, data[attribute].describe())
-
-    def clear_middle_frame(self):
-        """Clear the middle frame containing the graphs."""
-        for widget in self.middle_frame.winfo_children():
-            widget.destroy()
-
-    def apply_sidebar_filters(self, data):
-        """Apply filters based on the sidebar selections to the provided data."""
-        location = self.sidebar.location_var.get()
-        season = self.sidebar.season_var.get()
-        filtered_data = data.copy()
-        if location != 'All':
-            filtered_data = filtered_data[self.model.df['Location'] == location]
-        if season != 'All':
-            filtered_data = filtered_data[self.model.df['Season'] == season]
-        return filtered_data
+        self.display_graph_and_stats(fig, stats)
+
+    def apply_sidebar_filters(self, columns, filters):
+        """Query columns for the rows matching the sidebar filters, a Series for a single column."""
+        return self.model.query().select(*columns).filter(*filters).execute()
@@ -4,8 +4,6 @@ page.py: Module for defining the different pages of the application.
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 class Page:
     """Base class for different pages in the application."""
@@ -17,20 +15,34 @@ class Page:
         self.view = view
         self.graph_manager = self.view.graph_manager
         self.current_page = None
-
-    def switch_to_page(self, page_name):
-        """Switch to the specified page."""
-        if self.current_page != page_name:
-            self.destroy_current_page()
-            getattr(self, f"init_{self.current_page.lower()}_page")()
+        self.filter_state = None
+
+    def capture_frames(self):
+        """Remember the frames the graph manager created for this page."""
+        self.middle_frame = self.graph_manager.middle_frame
+        self.bottom_frame = self.graph_manager.bottom_frame
+        self.bottom_label = self.graph_manager.bottom_label
+
+    def show(self):
+        """Show the page's frames again and point the graph manager back at them."""
+        self.middle_frame.pack(expand=True, fill=tk.BOTH)
+        self.bottom_frame.pack(expand=True, fill=tk.BOTH)
+        self.graph_manager.middle_frame = self.middle_frame
+        self.graph_manager.bottom_frame = self.bottom_frame
+        self.graph_manager.bottom_label = self.bottom_label
+
+    def hide(self):
+        """Hide the page's frames without destroying them."""
+        self.middle_frame.pack_forget()
+        self.bottom_frame.pack_forget()
+
+    def refresh_if_stale(self):
+        """Update the graphs if the filters changed since the page was last refreshed."""
+        if self.filter_state is None or self.filter_state != self.controller.current_filter_state():
             self.controller.update_graphs()
 
-    def destroy_current_page(self):
-        """Destroy the current page."""
-        if self.graph_manager.middle_frame:
-            self.graph_manager.middle_frame.destroy()
-        if self.graph_manager.bottom_frame:
-            self.graph_manager.bottom_frame.destroy()
+    def show_summary(self, summary):
+        """Show a set of aggregates on the page's graphs."""
 
 class HomePage(Page):
     """Class representing the home page of the application."""
@@ -46,6 +58,13 @@ class HomePage(Page):
         self.graph_manager.create_category_graph()
         self.graph_manager.create_gender_graph()
         self.graph_manager.create_shipping_graph()
+        self.capture_frames()
+
+    def show_summary(self, summary):
+        """Show the category, gender and shipping aggregates."""
+        self.graph_manager.update_category_graph(summary['category_counts'])
+        self.graph_manager.update_gender_graph(summary['gender_counts'])
+        self.graph_manager.update_shipping_graph(summary['shipping_counts'])
 
 class ProductsPage(Page):
     """Class representing the products page of the application."""
@@ -59,6 +78,32 @@ class ProductsPage(Page):
         """Initialize the products page."""
         self.graph_manager.create_graph_area()
         self.graph_manager.create_top_items_graph()
+        self.init_top_items_accuracy_label()
+        self.capture_frames()
+
+    def init_top_items_accuracy_label(self):
+        """Initialize the label showing how the top items were counted."""
+        self.top_items_mode_frame = tk.Frame(self.graph_manager.bottom_frame, bg='#282434')
+        self.top_items_mode_frame.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.top_items_mode_label = tk.Label(self.top_items_mode_frame, text="Top Items Counting:",
+                                             bg='black', fg='white', font=('Bold', 10))
+        self.top_items_mode_label.pack(anchor='w', padx=10)
+
+        self.top_items_accuracy_label = tk.Label(self.top_items_mode_frame, text="", bg='#282434',
+                                                 fg='white', font=('Courier', 9), justify=tk.LEFT)
+        self.top_items_accuracy_label.pack(anchor='w', padx=10, pady=5)
+
+    def show_summary(self, summary):
+        """Show the top items aggregate and the accuracy of its counts."""
+        self.graph_manager.update_top_items_graph(summary['top_items'])
+        accuracy = summary.get('top_items_accuracy')
+        if accuracy:
+            accuracy_text = (f"{accuracy['mode']}: within ±{accuracy['max_error']}\n"
+                             f"of {accuracy['total']} purchases")
+            if accuracy['confidence'] < 1:
+                accuracy_text += f"\n({accuracy['confidence']:.1%} confidence)"
+            self.top_items_accuracy_label.config(text=accuracy_text)
 
 class Attribute_ExplorerPage(Page):
     """Class representing the attribute explorer page of the application."""
@@ -74,6 +119,7 @@ class Attribute_ExplorerPage(Page):
         self.init_attribute_dropdowns()
         self.init_graph_type_dropdown()
         self.init_generate_button()
+        self.capture_frames()
 
     def init_attribute_dropdowns(self):
         """Initialize the attribute dropdowns."""
@@ -102,7 +148,8 @@ class Attribute_ExplorerPage(Page):
         self.graph_type_label = tk.Label(self.graph_type_frame, text="Select Graph Type:", bg='black', fg='white', font=('Bold', 10))
         self.graph_type_label.pack(anchor='w', padx=10)
 
-        graph_types = ["Bar Chart", "Pie Chart", "Line Chart", "Scatter Plot", "Histogram", "Box Plot"]
+        graph_types = ["Bar Chart", "Pie Chart", "Line Chart", "Scatter Plot", "Histogram",
+                       "Box Plot", "Heatmap", "Grouped Bar Chart"]
         self.graph_type_var = tk.StringVar(value=graph_types[0])
 
         self.graph_type_dropdown = ttk.Combobox(self.graph_type_frame, textvariable=self.graph_type_var, values=graph_types, state='readonly')
@@ -121,33 +168,31 @@ class Attribute_ExplorerPage(Page):
         attribute1 = self.attribute_var1.get()
         attribute2 = self.attribute_var2.get()
         graph_type = self.graph_type_var.get()
-        if attribute1 == "None" or (graph_type in ["Scatter Plot", "Box Plot"] and attribute2 == "None"):
+        pair_types = ["Scatter Plot", "Box Plot", "Heatmap", "Grouped Bar Chart"]
+        if attribute1 == "None" or (graph_type in pair_types and attribute2 == "None"):
             messagebox.showerror("Error", "Please select valid attribute(s) for the selected graph type.")
             return
-        data = self.model.df[attribute1]
-        if attribute2 != "None":
-            data2 = self.model.df[attribute2]
-        else:
-            data2 = None
+        if graph_type in ["Heatmap", "Grouped Bar Chart"] and not (
+                self.model.has_joint_table(attribute1) and self.model.has_joint_table(attribute2)):
+            messagebox.showerror("Error", "The selected attributes have too many distinct values "
+                                          "for this graph type.")
+            return
+        columns = [attribute1] if attribute2 == "None" else [attribute1, attribute2]
         if graph_type == "Bar Chart":
-            self.graph_manager.show_bar_chart(data, x_title=attribute1, y_title="Count")
+            self.graph_manager.show_bar_chart(columns, x_title=attribute1, y_title="Count")
         elif graph_type == "Pie Chart":
-            self.graph_manager.show_pie_chart(data, title=attribute1)
+            self.graph_manager.show_pie_chart(columns, title=attribute1)
         elif graph_type == "Line Chart":
-            if data2 is not None:
-                data = self.model.df[[attribute1, attribute2]]
-                x_title = attribute1 if data.columns[0] == attribute1 else attribute2
-                y_title = attribute2 if data.columns[1] == attribute2 else attribute1
-            else:
-                x_title, y_title = attribute1, None
-            self.graph_manager.show_line_chart(data, x_title=x_title, y_title=y_title)
+            y_title = attribute2 if attribute2 != "None" else None
+            self.graph_manager.show_line_chart(columns, x_title=attribute1, y_title=y_title)
         elif graph_type == "Scatter Plot":
-            if data2 is not None:
-                data = self.model.df[[attribute1, attribute2]]
-            self.graph_manager.show_scatter_plot(data, x_title=attribute1, y_title=attribute2)
+            self.graph_manager.show_scatter_plot(columns, x_title=attribute1, y_title=attribute2)
         elif graph_type == "Histogram":
-            self.graph_manager.show_histogram(data, x_title=attribute1, y_title="Frequency")
+            self.graph_manager.show_histogram([attribute1], x_title=attribute1, y_title="Frequency")
         elif graph_type == "Box Plot":
-            if data2 is not None:
-                data = self.model.df[[attribute1, attribute2]]
-            self.graph_manager.show_box_plot(attribute1, data, x_title=attribute1, y_title=attribute2)
+            self.graph_manager.show_box_plot(attribute1, x_title=attribute1, y_title=attribute2,
+                                             by=attribute2)
+        elif graph_type == "Heatmap":
+            self.graph_manager.show_heatmap(attribute1, attribute2)
+        elif graph_type == "Grouped Bar Chart":
+            self.graph_manager.show_grouped_bar_chart(attribute1, attribute2)
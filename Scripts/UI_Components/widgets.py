@@ -4,6 +4,34 @@ widgets.py: This module contains custom tkinter Frame classes for the header and
 import tkinter as tk
 from tkinter import ttk
 
+class SplashFrame(tk.Frame):
+    """A custom tkinter Frame shown while the dataset and plotting libraries load."""
+    def __init__(self, app):
+        """Initialize the SplashFrame."""
+        super().__init__(app, bg='#282434')
+        self.create_widgets()
+
+    def create_widgets(self):
+        """Create and configure the title, status text and progress bar of the SplashFrame."""
+        title_label = tk.Label(self, text='ShopperTrends Analyzer', bg='#282434', fg='white',
+                               font=('Bold', 24))
+        title_label.pack(pady=(250, 20))
+        self.status_label = tk.Label(self, text='Starting...', bg='#282434', fg='orange',
+                                     font=('Bold', 12))
+        self.status_label.pack(pady=10)
+        self.progress = ttk.Progressbar(self, mode='indeterminate', length=300)
+        self.progress.pack(pady=10)
+        self.progress.start(15)
+
+    def set_status(self, text):
+        """Show the current loading step."""
+        self.status_label.config(text=text)
+
+    def close(self):
+        """Stop the progress bar and remove the SplashFrame."""
+        self.progress.stop()
+        self.destroy()
+
 class HeaderFrame(tk.Frame):
     """A custom tkinter Frame for the header section of the application."""
     def __init__(self, app, model):
@@ -21,6 +49,10 @@ class HeaderFrame(tk.Frame):
         emoji_label.pack(side=tk.LEFT, anchor=tk.W, padx=(20, 0))
         text_label = tk.Label(self, text='ShopperTrends Analyzer', bg='#282434', fg='white', font=('Bold', 15))
         text_label.pack(side=tk.LEFT, anchor=tk.W, padx=15)
+        self.status_label = tk.Label(self, text='', bg='#282434', fg='orange', font=('Bold', 11))
+        self.status_label.pack(side=tk.LEFT, anchor=tk.W, padx=10)
+        self.metrics_label = tk.Label(self, text='', bg='#282434', fg='lightgreen',
+                                      font=('Courier', 9), justify=tk.LEFT)
         self.total_customers_label = tk.Label(self, text='Total Customers: ', bg='black', fg='white', font=('Bold', 13), highlightbackground="red", highlightthickness=2)
         self.total_customers_label.pack(side=tk.RIGHT, padx=10)
         self.average_rating_label = tk.Label(self, text='Average Rating: ', bg='black', fg='white', font=('Bold', 13), highlightbackground="red", highlightthickness=2)
@@ -28,6 +60,16 @@ class HeaderFrame(tk.Frame):
         self.total_purchases_label = tk.Label(self, text='Total Purchases: ', bg='black', fg='white', font=('Bold', 13), highlightbackground="red", highlightthickness=2)
         self.total_purchases_label.pack(side=tk.RIGHT, padx=10)
 
+    def show_metrics(self, text):
+        """Show the timing overlay with the given text."""
+        self.metrics_label.config(text=text)
+        if not self.metrics_label.winfo_ismapped():
+            self.metrics_label.pack(side=tk.LEFT, anchor=tk.W, padx=10)
+
+    def hide_metrics(self):
+        """Hide the timing overlay."""
+        self.metrics_label.pack_forget()
+
 class SidebarFrame(tk.Frame):
     """A custom tkinter Frame for the sidebar section of the application."""
     def __init__(self, app, controller, model, view):
@@ -55,15 +97,20 @@ class SidebarFrame(tk.Frame):
         default_btn = tk.Button(btn_box_frame, text=' 🔄 Return to Default', bg='black', fg='white', font=('Bold', 12), borderwidth=0, highlightthickness=0, anchor='w', command=self.controller.reset_filters)
         default_btn.pack(fill=tk.X, pady=10)
 
+        # Shown instead of the filters while a large dataset is still being read
+        self.filter_notice = tk.Label(filter_box_frame, text='Filters apply when loading finishes',
+                                      bg='black', fg='orange', font=('Bold', 10))
+
         # Category filter
         category_label = tk.Label(filter_box_frame, text='Select The Category:', bg='black', fg='white', font=('Bold', 10))
         category_label.pack(anchor='w', padx=10)
+        self.category_label = category_label
         category_options = list(self.model.df['Category'].unique())
         self.category_options = category_options
         self.category_vars = [tk.BooleanVar(value=False) for _ in category_options]
+        self.category_buttons = []
         for var, option in zip(self.category_vars, category_options):
-            chk = tk.Checkbutton(filter_box_frame, text=option, variable=var, onvalue=True, offvalue=False, bg='black', fg='white', font=('Bold', 10), command=self.controller.update_graphs)
-            chk.pack(anchor='w', padx=10)
+            self.add_option_button(filter_box_frame, self.category_buttons, option, var)
         
         # Size filter
         size_label = tk.Label(filter_box_frame, text='Select The Size:', bg='black', fg='white', font=('Bold', 10))
@@ -71,9 +118,9 @@ class SidebarFrame(tk.Frame):
         size_options = list(self.model.df['Size'].unique())
         self.size_options = size_options
         self.size_vars = [tk.BooleanVar(value=False) for _ in size_options]
+        self.size_buttons = []
         for var, option in zip(self.size_vars, size_options):
-            chk = tk.Checkbutton(filter_box_frame, text=option, variable=var, onvalue=True, offvalue=False, bg='black', fg='white', font=('Bold', 10), command=self.controller.update_graphs)
-            chk.pack(anchor='w', padx=10)
+            self.add_option_button(filter_box_frame, self.size_buttons, option, var)
 
         # Location filter
         locations_label = tk.Label(filter_box_frame, text='Location:', bg='black', fg='white', font=('Bold', 10))
@@ -90,3 +137,47 @@ class SidebarFrame(tk.Frame):
         self.season_var = tk.StringVar(value='All')
         self.season_dropdown = ttk.Combobox(filter_box_frame, textvariable=self.season_var, values=season_options, state='readonly')
         self.season_dropdown.pack(anchor='w', padx=10)
+
+    def add_option_button(self, filter_box_frame, buttons, option, var):
+        """Add a filter checkbox after the other checkboxes of its group."""
+        chk = tk.Checkbutton(filter_box_frame, text=option, variable=var, onvalue=True,
+                             offvalue=False, bg='black', fg='white', font=('Bold', 10),
+                             command=self.controller.request_refresh)
+        if buttons:
+            chk.pack(anchor='w', padx=10, after=buttons[-1])
+        else:
+            chk.pack(anchor='w', padx=10)
+        buttons.append(chk)
+
+    def refresh_options(self):
+        """Offer the filter values that appeared in the dataset since the sidebar was created."""
+        for column, options, variables, buttons in (
+                ('Category', self.category_options, self.category_vars, self.category_buttons),
+                ('Size', self.size_options, self.size_vars, self.size_buttons)):
+            for option in self.model.df[column].unique():
+                if option not in options:
+                    var = tk.BooleanVar(value=False)
+                    self.add_option_button(buttons[-1].master, buttons, option, var)
+                    options.append(option)
+                    variables.append(var)
+        self.location_dropdown.configure(values=['All'] + list(self.model.df['Location'].unique()))
+        self.season_dropdown.configure(values=['All'] + list(self.model.df['Season'].unique()))
+
+    def set_filters_enabled(self, enabled):
+        """Enable or disable every filter, showing a notice while they are disabled."""
+        for chk in self.category_buttons + self.size_buttons:
+            chk.configure(state=tk.NORMAL if enabled else tk.DISABLED)
+        for dropdown in (self.location_dropdown, self.season_dropdown):
+            dropdown.configure(state='readonly' if enabled else tk.DISABLED)
+        if enabled:
+            self.filter_notice.pack_forget()
+        else:
+            self.filter_notice.pack(anchor='w', padx=10, before=self.category_label)
+
+    def get_filters(self):
+        """Return the selected categories, sizes, location and season."""
+        category_filters = [option for var, option in zip(self.category_vars, self.category_options)
+                            if var.get()]
+        size_filters = [option for var, option in zip(self.size_vars, self.size_options)
+                        if var.get()]
+        return category_filters, size_filters, self.location_var.get(), self.season_var.get()
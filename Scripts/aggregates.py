@@ -0,0 +1,53 @@
+"""
+aggregates.py: Module for accumulating dashboard aggregates over streamed chunks of data.
+"""
+from collections import Counter
+import pandas as pd
+from topk import SpaceSavingTopK
+
+COUNT_COLUMNS = ('Category', 'Gender', 'Shipping Type')
+
+class RunningAggregates:
+    """Class for keeping the dashboard aggregates up to date as chunks of rows arrive."""
+    def __init__(self):
+        """Initialize RunningAggregates with empty counts and totals."""
+        self.counts = {column: Counter() for column in COUNT_COLUMNS}
+        self.top_items = SpaceSavingTopK()
+        self.total_customers = 0
+        self.total_purchases = 0
+        self.rating_sum = 0.0
+        self.rating_count = 0
+
+    def update(self, chunk):
+        """Add the rows of a chunk to the running counts and totals."""
+        for column, counter in self.counts.items():
+            counter.update({value: count for value, count in chunk[column].value_counts().items()
+                            if count})
+        item_counts = chunk['Item Purchased'].value_counts()
+        self.top_items.update(item_counts[item_counts > 0])
+        self.total_customers += len(chunk)
+        self.total_purchases += int(chunk['Purchase Amount (USD)'].sum())
+        self.rating_sum += float(chunk['Review Rating'].sum())
+        self.rating_count += int(chunk['Review Rating'].count())
+
+    def get_counts(self, column):
+        """Return the counts accumulated for a column, largest first."""
+        counts = pd.Series(dict(self.counts[column]), dtype='int64')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def summary(self, top_n=10):
+        """Return the aggregates in the same shape as DashboardModel.summarize_filters."""
+        category_counts = self.get_counts('Category')
+        if self.total_customers:
+            category_counts = category_counts / category_counts.sum() * 100
+        return {
+            'category_counts': category_counts,
+            'gender_counts': self.get_counts('Gender'),
+            'shipping_counts': self.get_counts('Shipping Type'),
+            'top_items': self.top_items.top(top_n),
+            'top_items_accuracy': self.top_items.accuracy(),
+            'total_customers': self.total_customers,
+            'average_rating': (self.rating_sum / self.rating_count if self.rating_count
+                               else float('nan')),
+            'total_purchases': self.total_purchases,
+        }
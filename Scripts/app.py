@@ -1,20 +1,98 @@
 """
 app.py: Tkinter application for data visualization.
+
+The window and a splash screen appear straight away; pandas, matplotlib and the dataset
+are loaded on a background thread before the dashboard is built.
 """
+import argparse
+import queue
+import threading
+import time
 import tkinter as tk
-from controller import DashboardController
+from tkinter import messagebox
+from metrics import metrics
+from UI_Components.widgets import SplashFrame
+
+STARTED = time.perf_counter()
+STARTUP_POLL_MS = 50
 
 class App(tk.Tk):
     """Main application class."""
-    def __init__(self):
-        """Initialize the application."""
+    def __init__(self, dataset=None, selections=()):
+        """Initialize the application with a splash screen and start loading in the background.
+
+        dataset and selections are passed on to DashboardModel; the bundled dataset is loaded
+        by default.
+        """
         super().__init__()
-        self.controller = DashboardController(self)
+        self.dataset = dataset
+        self.selections = selections
+        self.geometry('1366x768')
+        self.title('ShopperTrends Analyzer')
+        self.controller = None
+        self.splash = SplashFrame(self)
+        self.splash.pack(fill=tk.BOTH, expand=True)
+        self.after_idle(lambda: metrics.record('startup.splash', time.perf_counter() - STARTED))
+        self.loaded = queue.Queue()
+        threading.Thread(target=self.load, daemon=True).start()
+        self.after(STARTUP_POLL_MS, self.poll_loaded)
+
+    def load(self):
+        """Import the dashboard modules and load the dataset, posting progress onto the queue."""
+        # pylint: disable=import-outside-toplevel,broad-except
+        try:
+            self.loaded.put(('status', 'Loading libraries...'))
+            with metrics.span('startup.imports'):
+                from controller import DashboardController
+                from model import DashboardModel
+            self.loaded.put(('status', 'Loading dataset...'))
+            with metrics.span('startup.dataset'):
+                model = DashboardModel(self.dataset, self.selections)
+            self.loaded.put(('done', (DashboardController, model)))
+        except Exception as error:
+            self.loaded.put(('error', error))
+
+    def poll_loaded(self):
+        """Show loading progress and build the dashboard once the background load has finished."""
+        while True:
+            try:
+                kind, value = self.loaded.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'status':
+                self.splash.set_status(value)
+            elif kind == 'error':
+                messagebox.showerror("Error", f"Could not load the dataset:\n{value}")
+                self.destroy()
+                return
+            else:
+                self.start_dashboard(*value)
+                return
+        self.after(STARTUP_POLL_MS, self.poll_loaded)
+
+    def start_dashboard(self, controller_class, model):
+        """Replace the splash screen with the dashboard."""
+        self.splash.close()
+        with metrics.span('startup.build_ui'):
+            self.controller = controller_class(self, model, STARTED)
         self.protocol("WM_DELETE_WINDOW", self.controller.on_close)
 
-def main():
+def main(argv=None):
     """Entry point of the application."""
-    root = App()
+    parser = argparse.ArgumentParser(description='Explore a shopping trends dataset.')
+    parser.add_argument('--dataset', help='CSV file, or folder of partition files, to load instead '
+                                          'of the bundled dataset.')
+    parser.add_argument('--where', nargs='+', default=[], metavar='COLUMN=VALUE',
+                        help='Only load the rows with one of these values, skipping partition '
+                             'files that cannot hold them.')
+    args = parser.parse_args(argv)
+    selections = {}
+    for condition in args.where:
+        column, separator, value = condition.partition('=')
+        if not separator:
+            parser.error(f'--where expects COLUMN=VALUE, got {condition}')
+        selections.setdefault(column, []).append(value)
+    root = App(args.dataset, tuple(selections.items()))
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+"""
+benchmark.py: Benchmark suite timing the dashboard's queries and chart rendering on synthetic data.
+
+Example:
+    python benchmark.py --rows 10000 1000000 --repeat 3 --output benchmark.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from column_store import ColumnStore
+from metrics import metrics
+from model import DashboardModel
+from UI_Components.graph import GraphManager
+
+REFERENCE_DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'Dataset', 'shopping_trends_updated.csv')
+DEFAULT_ROWS = (10000, 100000, 1000000)
+GENERATE_CHUNK = 1000000
+JOINT_COLUMNS = (('Category', 'Item Purchased'),
+                 ('Gender', 'Subscription Status', 'Discount Applied', 'Promo Code Used'))
+CLICK_SEQUENCE = (
+    ([], [], 'All', 'All'),
+    (['Clothing'], [], 'All', 'All'),
+    (['Clothing', 'Footwear'], [], 'All', 'All'),
+    (['Clothing', 'Footwear'], ['M'], 'All', 'All'),
+    (['Clothing', 'Footwear'], ['M', 'L'], 'California', 'All'),
+    (['Clothing', 'Footwear'], ['M', 'L'], 'California', 'Summer'),
+    ([], [], 'All', 'Winter'),
+    ([], [], 'All', 'All'),
+)
+
+def reference_distributions(path):
+    """Return the relative frequencies of each column, or group of joint columns, of a CSV file."""
+    df = pd.read_csv(path)
+    joint = [column for group in JOINT_COLUMNS for column in group]
+    groups = list(JOINT_COLUMNS) + [(column,) for column in df.columns
+                                    if column != 'Customer ID' and column not in joint]
+    return list(df.columns), [(group, df[list(group)].value_counts(normalize=True))
+                              for group in groups]
+
+def generate_dataset(rows, path, reference, seed=0):
+    """Write a CSV file with the schema and value distributions of a reference dataset, in chunks.
+
+    Columns are sampled independently, except JOINT_COLUMNS, whose combinations are sampled jointly
+    so that items stay in their category and the Yes/No flags keep their correlation.
+    """
+    columns, distributions = reference_distributions(reference)
+    generator = np.random.default_rng(seed)
+    for start in range(0, rows, GENERATE_CHUNK):
+        size = min(GENERATE_CHUNK, rows - start)
+        chunk = {'Customer ID': np.arange(start + 1, start + size + 1)}
+        for group, frequencies in distributions:
+            picks = generator.choice(len(frequencies), size=size, p=frequencies.to_numpy())
+            for level, column in enumerate(group):
+                chunk[column] = frequencies.index.get_level_values(level).to_numpy()[picks]
+        pd.DataFrame(chunk, columns=columns).to_csv(path, mode='w' if start == 0 else 'a',
+                                                    header=start == 0, index=False)
+    return path
+
+def load_model(path):
+    """Load a dataset into a DashboardModel, reading a streamed dataset to the end."""
+    model = DashboardModel(path)
+    if model.streaming:
+        for chunk in model.stream:
+            model.add_chunk(chunk)
+        model.finish_streaming(model.assemble_streamed())
+    return model
+
+def agg_chart():
+    """Return a figure canvas and axes styled like the dashboard charts, drawn with Agg."""
+    figure = Figure(figsize=(6, 3), facecolor='#282434')
+    axes = figure.add_subplot(111)
+    axes.tick_params(colors='white')
+    for spine in axes.spines.values():
+        spine.set_edgecolor('white')
+    canvas = FigureCanvasAgg(figure)
+    canvas.draw()
+    return canvas, axes
+
+def create_graph_manager(model):
+    """Return a GraphManager with the Home and Products charts on off-screen Agg canvases.
+
+    No Tk root is needed, so rendering is measured on machines without a display.
+    """
+    graphs = GraphManager(None, model, None, SimpleNamespace(sidebar=None, current_page='Home'))
+    graphs.canvas_category, graphs.ax_category = agg_chart()
+    graphs.canvas_gender, graphs.ax_gender = agg_chart()
+    graphs.canvas_shipping, graphs.axs_shipping = agg_chart()
+    graphs.canvas_top_items, graphs.ax_top_items = agg_chart()
+    graphs.category_bars = graphs.gender_pie = graphs.shipping_lines = None
+    graphs.bars = graphs.top_item_labels = None
+    return graphs
+
+def update_graphs(graphs, summary):
+    """Update the Home and Products charts from a summary the way the pages do."""
+    graphs.update_category_graph(summary['category_counts'])
+    graphs.update_gender_graph(summary['gender_counts'])
+    graphs.update_shipping_graph(summary['shipping_counts'])
+    graphs.update_top_items_graph(summary['top_items'])
+
+def peak_rss_mb():
+    """Return the peak resident memory of this process in megabytes, or None if not available."""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if platform.system() == 'Darwin' else peak / 2 ** 10
+
+def run_benchmark(path, repeat, trace_memory=False):
+    """Time loading, the scripted filter clicks, item details and chart rendering on one dataset.
+
+    Rendering goes through the GraphManager update methods on off-screen Agg canvases.
+    """
+    metrics.clear()
+    if trace_memory:
+        tracemalloc.start()
+    shutil.rmtree(ColumnStore(path).directory, ignore_errors=True)
+    with metrics.span('bench.load_cold'):
+        load_model(path)
+    with metrics.span('bench.load_cached'):
+        model = load_model(path)
+    graphs = create_graph_manager(model)
+    for _ in range(repeat):
+        model.result_cache.clear()
+        for filters in CLICK_SEQUENCE:
+            with metrics.span('bench.filter_data'):
+                model.filter_data(*filters)
+            with metrics.span('bench.summary'):
+                summary = model.summarize_filters(*filters)
+            with metrics.span('bench.item_details'):
+                for item_name in summary['top_items'].index[:3]:
+                    model.item_details(item_name, *filters)
+            with metrics.span('bench.render'):
+                update_graphs(graphs, summary)
+        for filters in CLICK_SEQUENCE:
+            with metrics.span('bench.summary_cached'):
+                model.summarize_filters(*filters)
+    result = {'rows': len(model.df), 'file_mb': os.path.getsize(path) / 2 ** 20,
+              'frame_mb': model.memory_footprint()['Total'] / 2 ** 20,
+              'spans': metrics.summary(), 'peak_rss_mb': peak_rss_mb()}
+    if trace_memory:
+        result['peak_traced_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result
+
+def current_commit():
+    """Return the abbreviated git commit of the working tree, or None outside a repository."""
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+def main(argv=None):
+    """Entry point of the benchmark command."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark ShopperTrends dashboard queries on synthetic data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS),
+                        help='Dataset sizes to generate and benchmark.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Times to replay the filter click sequence.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data generator.')
+    parser.add_argument('--reference', default=REFERENCE_DATASET,
+                        help='CSV file whose distributions are sampled.')
+    parser.add_argument('--data-dir',
+                        help='Directory to keep the generated datasets in, reused if present.')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also track peak Python allocations with tracemalloc (slower).')
+    parser.add_argument('--output', default='benchmark.json',
+                        help='JSON file to write the results to.')
+    args = parser.parse_args(argv)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='shoppertrends-bench-')
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    try:
+        for rows in args.rows:
+            path = os.path.join(data_dir, f'synthetic_{rows}_{args.seed}.csv')
+            if not os.path.exists(path):
+                generate_dataset(rows, path, args.reference, args.seed)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(run_benchmark, path, args.repeat, args.trace_memory).result()
+            results.append(result)
+            print(f"{rows} rows: summary p50 {result['spans']['bench.summary']['p50_ms']:.1f} ms, "
+                  f"render p50 {result['spans']['bench.render']['p50_ms']:.1f} ms, "
+                  f"frame {result['frame_mb']:.1f} MB, "
+                  f"peak RSS {result['peak_rss_mb'] or float('nan'):.0f} MB")
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    report = {'commit': current_commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'python': platform.python_version(), 'platform': platform.platform(),
+              'repeat': args.repeat, 'seed': args.seed, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f'Wrote results for {len(results)} dataset(s) to {args.output}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+column_store.py: Module for caching a parsed dataset as memory-mapped binary columns.
+"""
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 3
+
+class ColumnStore:
+    """Class for saving and loading a binary columnar copy of a CSV file."""
+    def __init__(self, source):
+        """Initialize ColumnStore for the given CSV file."""
+        self.source = source
+        folder, filename = os.path.split(source)
+        self.directory = os.path.join(folder, f'.{filename}.cache')
+        self.header_path = os.path.join(self.directory, 'schema.json')
+        self.source_size = None
+
+    def fingerprint(self):
+        """Return the size and modification time of the source file."""
+        stat = os.stat(self.source)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def source_hash(self):
+        """Return the SHA-256 digest of the source file."""
+        digest = hashlib.sha256()
+        with open(self.source, 'rb') as source_file:
+            for block in iter(lambda: source_file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def read_header(self):
+        """Read the schema header, or return None if it is missing or unreadable."""
+        try:
+            with open(self.header_path, encoding='utf-8') as header_file:
+                return json.load(header_file)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self, header):
+        """Check whether a header still describes the current source file."""
+        if header is None or header.get('version') != STORE_VERSION:
+            return False
+        fingerprint = self.fingerprint()
+        if header['size'] != fingerprint['size']:
+            return False
+        if header['mtime_ns'] == fingerprint['mtime_ns']:
+            return True
+        if header['sha256'] != self.source_hash():
+            return False
+        header.update(fingerprint)
+        try:
+            self.write_header(self.directory, header)
+        except OSError:
+            pass
+        return True
+
+    def load(self):
+        """Load the cached DataFrame, or return None if the cache is missing or stale.
+
+        source_size is set to the size of the source file the cache was saved from.
+        """
+        header = self.read_header()
+        if not self.is_valid(header):
+            return None
+        columns = {}
+        try:
+            for position, column in enumerate(header['columns']):
+                values = np.load(os.path.join(self.directory, f'{position}.npy'), mmap_mode='r')
+                if column['kind'] in ('category', 'object'):
+                    values = pd.Categorical.from_codes(values, categories=column['categories'])
+                    if column['kind'] == 'object':
+                        values = np.asarray(values, dtype=object)
+                columns[column['name']] = values
+        except (OSError, ValueError):
+            return None
+        self.source_size = header['size']
+        return pd.DataFrame(columns, columns=[column['name'] for column in header['columns']])
+
+    def save(self, df):
+        """Write the DataFrame as one binary file per column plus a schema header."""
+        temp_directory = f'{self.directory}.tmp'
+        try:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            os.makedirs(temp_directory)
+            header = {'version': STORE_VERSION, 'rows': len(df), 'sha256': self.source_hash(),
+                      'columns': []}
+            header.update(self.fingerprint())
+            for position, name in enumerate(df.columns):
+                series = df[name]
+                column = {'name': name, 'kind': str(series.dtype)}
+                if series.dtype == object:
+                    series = series.astype('category')
+                    column['kind'] = 'object'
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    column['categories'] = series.cat.categories.tolist()
+                    values = series.cat.codes.to_numpy()
+                else:
+                    values = series.to_numpy()
+                np.save(os.path.join(temp_directory, f'{position}.npy'), values)
+                header['columns'].append(column)
+            self.write_header(temp_directory, header)
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.rename(temp_directory, self.directory)
+        except OSError:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+
+    def write_header(self, directory, header):
+        """Write the schema header into the given directory."""
+        with open(os.path.join(directory, 'schema.json'), 'w', encoding='utf-8') as header_file:
+            json.dump(header, header_file)
@@ -1,57 +1,217 @@
 """
 controller.py: Module for handling user interactions and application logic.
 """
-from tkinter import messagebox
+import queue
+import threading
+import time
+from tkinter import filedialog, messagebox
 from model import DashboardModel
 from view import DashboardUI
+from result_cache import filter_key
+from worker import ComputeExecutor
+from metrics import metrics
+
+STREAM_POLL_MS = 100
+TAIL_POLL_MS = 2000
+REFRESH_DELAY_MS = 150
+METRICS_POLL_MS = 1000
+STARTUP_SPANS = (('imports', 'startup.imports'), ('dataset', 'startup.dataset'),
+                 ('ui', 'startup.build_ui'), ('first summary', 'startup.first_summary'))
 
 class DashboardController:
     """Class for controlling the flow of the application."""
-    def __init__(self, app):
-        """Initialize DashboardController."""
+    def __init__(self, app, model=None, startup_started=None):
+        """Initialize DashboardController, loading the dataset unless a model is given.
+
+        startup_started is the perf_counter time the application started at, used to
+        record the startup timing breakdown once the first summary is shown.
+        """
         self.app = app
-        self.model = DashboardModel()
+        self.model = model if model is not None else DashboardModel()
+        self.executor = ComputeExecutor(self.app, self.set_busy)
         self.view = DashboardUI(self, self.app, self.model)
         self.head_frame = self.view.head_frame
         self.sidebar = self.view.sidebar
         self.graph_manager = self.view.graph_manager
+        self.pending_refresh = None
+        self.refresh_started = None
+        self.metrics_overlay = None
+        self.startup_started = startup_started
         self.bind_events()
         self.update_graphs()
+        if self.model.streaming:
+            self.sidebar.set_filters_enabled(False)
+            self.start_streaming()
+        elif self.model.tail_offset is not None:
+            self.start_tailing()
 
     def bind_events(self):
         """Bind events to UI components."""
         for var in self.sidebar.category_vars:
-            var.trace('w', lambda *args, var=var: self.update_graphs)
+            var.trace('w', lambda *args: self.request_refresh())
         for var in self.sidebar.size_vars:
-            var.trace('w', lambda *args, var=var: self.update_graphs)
-        self.sidebar.location_dropdown.bind('<<ComboboxSelected>>', self.update_graphs)
-        self.sidebar.season_dropdown.bind('<<ComboboxSelected>>', self.update_graphs)
+            var.trace('w', lambda *args: self.request_refresh())
+        self.sidebar.location_dropdown.bind('<<ComboboxSelected>>', self.request_refresh)
+        self.sidebar.season_dropdown.bind('<<ComboboxSelected>>', self.request_refresh)
+        self.app.bind('<F12>', self.toggle_metrics_overlay)
+        self.app.bind('<Control-e>', self.export_metrics)
+
+    def request_refresh(self, event=None):
+        """Schedule a graph update, replacing any update that has not run yet."""
+        if self.pending_refresh is not None:
+            self.app.after_cancel(self.pending_refresh)
+        self.pending_refresh = self.app.after(REFRESH_DELAY_MS, self.run_pending_refresh)
+
+    def run_pending_refresh(self):
+        """Run the scheduled graph update with the filters selected at that moment."""
+        self.pending_refresh = None
+        self.update_graphs()
 
     def update_graphs(self, event=None):
         """Update graphs based on selected filters."""
-        category_filters = [option for var, option in zip(self.sidebar.category_vars,
-                                                           self.sidebar.category_options) if var.get()]
-        size_filters = [option for var, option in zip(self.sidebar.size_vars,
-                                                       self.sidebar.size_options) if var.get()]
-        location = self.sidebar.location_var.get()
-        season = self.sidebar.season_var.get()
-        filtered_data = self.model.filter_data(category_filters, size_filters, location, season)
-        category_counts = filtered_data['Category'].value_counts(normalize=True) * 100
-        gender_counts = filtered_data['Gender'].value_counts()
-        shipping_counts = filtered_data['Shipping Type'].value_counts()
-        top_items = filtered_data['Item Purchased'].value_counts().head(10)
-        if hasattr(self.graph_manager, 'ax_top_items'):
-            self.graph_manager.update_top_items_graph(top_items)
-        if hasattr(self.graph_manager, 'update_category_graph'):
-            self.graph_manager.update_category_graph(category_counts)
-        if hasattr(self.graph_manager, 'update_gender_graph'):
-            self.graph_manager.update_gender_graph(gender_counts)
-        if hasattr(self.graph_manager, 'update_shipping_graph'):
-            self.graph_manager.update_shipping_graph(shipping_counts)
-        total_customers = len(filtered_data)
-        average_rating = filtered_data['Review Rating'].mean()
-        total_purchases = filtered_data['Purchase Amount (USD)'].sum()
-        self.update_labels(total_customers, average_rating, total_purchases)
+        if self.model.streaming:
+            self.display_summary(self.model.running_aggregates.summary())
+            return
+        filters = self.sidebar.get_filters()
+        self.refresh_started = time.perf_counter()
+        self.executor.submit('summary', lambda: self.model.summarize_filters(*filters),
+                             lambda summary: self.display_summary(summary, filter_key(*filters)))
+
+    def current_filter_state(self):
+        """Return the normalized key of the filters currently selected in the sidebar."""
+        return filter_key(*self.sidebar.get_filters())
+
+    def set_busy(self, busy):
+        """Show or hide the busy indicator while background work is running."""
+        self.head_frame.status_label.config(text='Working...' if busy else '')
+        self.app.config(cursor='watch' if busy else '')
+
+    def display_summary(self, summary, filter_state=None):
+        """Show a set of aggregates on the current page and header labels.
+
+        filter_state records which filters the aggregates belong to, so hidden pages
+        know whether they need a refresh when shown again; None marks partial results.
+        """
+        page = self.view.page
+        page.show_summary(summary)
+        page.filter_state = filter_state
+        self.update_labels(summary['total_customers'], summary['average_rating'],
+                           summary['total_purchases'])
+        if filter_state is not None and self.refresh_started is not None:
+            metrics.record('refresh', time.perf_counter() - self.refresh_started)
+            if self.startup_started is not None:
+                metrics.record('startup.first_summary', time.perf_counter() - self.refresh_started)
+                metrics.record('startup.total', time.perf_counter() - self.startup_started)
+                self.startup_started = None
+            self.refresh_started = None
+
+    def toggle_metrics_overlay(self, event=None):
+        """Show or hide the timing overlay in the header."""
+        if self.metrics_overlay is None:
+            self.update_metrics_overlay()
+        else:
+            self.app.after_cancel(self.metrics_overlay)
+            self.metrics_overlay = None
+            self.head_frame.hide_metrics()
+
+    def update_metrics_overlay(self):
+        """Show the latest refresh latencies and slowest spans in the header overlay."""
+        summary = metrics.summary()
+        refresh = summary.get('refresh')
+        lines = [f"refresh p50 {refresh['p50_ms']:.0f} ms  p95 {refresh['p95_ms']:.0f} ms  "
+                 f"n={refresh['calls']}" if refresh else 'refresh: no samples yet']
+        histogram = metrics.histogram('refresh')
+        lines.append(' '.join(f'{bucket}:{count}' for bucket, count in histogram.items() if count))
+        slowest = sorted(((stats['p95_ms'], name) for name, stats in summary.items()
+                          if name != 'refresh' and not name.startswith('startup.')),
+                         reverse=True)[:2]
+        lines += [f'{name} p95 {p95:.0f} ms' for p95, name in slowest]
+        if 'startup.total' in summary:
+            lines.append(f"startup {summary['startup.total']['max_ms']:.0f} ms: " + ', '.join(
+                f"{label} {summary[name]['max_ms']:.0f}"
+                for label, name in STARTUP_SPANS if name in summary))
+        figures = self.graph_manager.figure_pool.stats()
+        lines.append(f"explorer figures {figures['figures']} "
+                     f"({figures['buffer_bytes'] / 2 ** 20:.1f} MB)")
+        self.head_frame.show_metrics('\n'.join(lines))
+        self.metrics_overlay = self.app.after(METRICS_POLL_MS, self.update_metrics_overlay)
+
+    def export_metrics(self, event=None):
+        """Save the collected timings to a JSON or CSV file chosen by the user."""
+        path = filedialog.asksaveasfilename(title='Export Metrics', defaultextension='.json',
+                                            filetypes=[('JSON', '*.json'), ('CSV', '*.csv')])
+        if path:
+            metrics.export(path)
+
+    def start_streaming(self):
+        """Read the remaining chunks of a streamed dataset on a background thread.
+
+        The running aggregates cannot be filtered, so the sidebar filters stay disabled until
+        streaming_finished.
+        """
+        self.chunk_queue = queue.Queue(maxsize=4)
+        threading.Thread(target=self.read_chunks, daemon=True).start()
+        self.app.after(STREAM_POLL_MS, self.poll_chunks)
+
+    def read_chunks(self):
+        """Push streamed chunks onto the queue, followed by None once the file is exhausted."""
+        for chunk in self.model.stream:
+            self.chunk_queue.put(chunk)
+        self.chunk_queue.put(None)
+
+    def poll_chunks(self):
+        """Fold queued chunks into the model and show the partial results."""
+        received = False
+        while True:
+            try:
+                chunk = self.chunk_queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                self.executor.submit('finish_streaming', self.model.assemble_streamed,
+                                     self.streaming_finished)
+                return
+            self.model.add_chunk(chunk)
+            received = True
+        if received:
+            self.display_summary(self.model.running_aggregates.summary())
+        self.app.after(STREAM_POLL_MS, self.poll_chunks)
+
+    def streaming_finished(self, indexes):
+        """Swap in the indexes of the fully streamed dataset and refresh every page from them.
+
+        The filter values found after the first chunk are offered and the filters are enabled.
+        """
+        self.model.finish_streaming(indexes)
+        self.sidebar.refresh_options()
+        self.sidebar.set_filters_enabled(True)
+        for page in self.view.pages.values():
+            page.filter_state = None
+        self.update_graphs()
+
+    def start_tailing(self):
+        """Watch the dataset file for appended rows."""
+        self.tail_pending = False
+        self.app.after(TAIL_POLL_MS, self.poll_tail)
+
+    def poll_tail(self):
+        """Parse newly appended rows in the background whenever the dataset file has grown."""
+        if self.model.tail_offset is None:
+            return
+        if not self.tail_pending and self.model.has_appended_rows():
+            self.tail_pending = True
+            self.executor.submit('tail', self.model.tail_appended, self.apply_appended)
+        self.app.after(TAIL_POLL_MS, self.poll_tail)
+
+    def apply_appended(self, added):
+        """Offer any new filter values and refresh every page once, after rows were appended."""
+        self.tail_pending = False
+        if not added:
+            return
+        self.sidebar.refresh_options()
+        for page in self.view.pages.values():
+            page.filter_state = None
+        self.request_refresh()
 
     def update_labels(self, total_customers, average_rating, total_purchases):
         """Update labels for total customers, average rating, and total purchases."""
@@ -70,7 +230,7 @@ class DashboardController:
             var.set(False)
         self.sidebar.location_var.set('All')
         self.sidebar.season_var.set('All')
-        self.update_graphs()
+        self.request_refresh()
 
     def on_close(self):
         """Handle window close events."""
@@ -78,4 +238,9 @@ class DashboardController:
                       title="Confirm Quit",
                       message="Do you really want to quit?")
         if quit_ok:
+            if self.pending_refresh is not None:
+                self.app.after_cancel(self.pending_refresh)
+            if self.metrics_overlay is not None:
+                self.app.after_cancel(self.metrics_overlay)
+            self.executor.shutdown()
             self.app.destroy()
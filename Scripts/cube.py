@@ -0,0 +1,151 @@
+"""
+cube.py: Module for answering dashboard queries from a precomputed aggregation cube.
+"""
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ('Category', 'Size', 'Location', 'Season')
+CUBE_COUNT_COLUMNS = ('Category', 'Gender', 'Shipping Type', 'Item Purchased')
+CUBE_MAX_VALUES = 1024
+
+def factorize(series):
+    """Return integer codes for a series, with missing values mapped to an extra trailing code."""
+    codes, uniques = pd.factorize(series)
+    codes = codes.astype(np.intp)
+    codes[codes < 0] = len(uniques)
+    return codes, list(uniques)
+
+def compact_codes(codes, count):
+    """Return codes from 0 to count in the smallest unsigned integer dtype that holds them."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if count <= np.iinfo(dtype).max:
+            return codes.astype(dtype, copy=False)
+    return codes
+
+def category_codes(series):
+    """Return compact codes and labels like factorize, reusing the codes of a categorical series.
+
+    The labels of a categorical series are all its categories, including unused ones. Without
+    missing values its codes are returned as they are, a view sharing the series' memory; their
+    dtype always has room for the extra missing code.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.array.codes
+        labels = list(series.cat.categories)
+        if (codes < 0).any():
+            return compact_codes(np.where(codes < 0, len(labels), codes), len(labels)), labels
+        return codes, labels
+    codes, labels = factorize(series)
+    return compact_codes(codes, len(labels)), labels
+
+def encode(series, labels):
+    """Return the codes of a series under existing factorize labels, or None for a new value."""
+    values = np.asarray(series, dtype=object)
+    codes = pd.Index(labels, dtype=object).get_indexer(values).astype(np.intp)
+    missing = series.isna().to_numpy()
+    if ((codes < 0) & ~missing).any():
+        return None
+    codes[missing] = len(labels)
+    return codes
+
+class AggregateCube:
+    """Class holding counts, purchase sums and rating sums per filter cell."""
+    def __init__(self, df):
+        """Build the cube with one cell per Category x Size x Location x Season combination."""
+        self.labels = {}
+        dimension_codes = []
+        for column in CUBE_DIMENSIONS:
+            codes, self.labels[column] = factorize(df[column])
+            dimension_codes.append(codes)
+        self.shape = tuple(len(self.labels[column]) + 1 for column in CUBE_DIMENSIONS)
+        self.value_labels = {}
+        value_codes = {}
+        for column in CUBE_COUNT_COLUMNS:
+            codes, labels = factorize(df[column])
+            if len(labels) > CUBE_MAX_VALUES:
+                continue
+            self.value_labels[column] = labels
+            value_codes[column] = codes
+        self.cells = np.ravel_multi_index(dimension_codes, self.shape)
+        (self.counts, self.amount_sums, self.rating_sums, self.rating_counts,
+         self.value_counts) = self.tally(self.cells, df, value_codes)
+
+    def tally(self, cells, df, value_codes):
+        """Return the counts, purchase sums, rating sums and counts, and value counts per cell."""
+        cell_count = int(np.prod(self.shape))
+        counts = np.bincount(cells, minlength=cell_count).reshape(self.shape)
+        amounts = df['Purchase Amount (USD)'].to_numpy(dtype=np.float64)
+        amount_sums = np.bincount(cells, weights=amounts, minlength=cell_count).reshape(self.shape)
+        ratings = df['Review Rating'].to_numpy(dtype=np.float64)
+        rated = ~np.isnan(ratings)
+        rating_sums = np.bincount(cells[rated], weights=ratings[rated],
+                                  minlength=cell_count).reshape(self.shape)
+        rating_counts = np.bincount(cells[rated], minlength=cell_count).reshape(self.shape)
+        value_counts = {}
+        for column, codes in value_codes.items():
+            width = len(self.value_labels[column]) + 1
+            counts_by_value = np.bincount(cells * width + codes, minlength=cell_count * width)
+            value_counts[column] = counts_by_value.reshape(self.shape + (width,))
+        return counts, amount_sums, rating_sums, rating_counts, value_counts
+
+    def add_rows(self, df):
+        """Add appended rows to the cube, returning False if a value has no cell in it."""
+        dimension_codes = [encode(df[column], self.labels[column]) for column in CUBE_DIMENSIONS]
+        value_codes = {column: encode(df[column], labels)
+                       for column, labels in self.value_labels.items()}
+        if any(codes is None for codes in dimension_codes + list(value_codes.values())):
+            return False
+        cells = np.ravel_multi_index(dimension_codes, self.shape)
+        counts, amount_sums, rating_sums, rating_counts, value_counts = self.tally(cells, df,
+                                                                                   value_codes)
+        self.cells = np.concatenate([self.cells, cells])
+        self.counts = self.counts + counts
+        self.amount_sums = self.amount_sums + amount_sums
+        self.rating_sums = self.rating_sums + rating_sums
+        self.rating_counts = self.rating_counts + rating_counts
+        self.value_counts = {column: self.value_counts[column] + counts
+                             for column, counts in value_counts.items()}
+        return True
+
+    def selection(self, category_filters, size_filters, location, season):
+        """Return the per-dimension code selections for the given filters."""
+        selected_values = (category_filters, size_filters,
+                           [] if location == 'All' else [location],
+                           [] if season == 'All' else [season])
+        selection = []
+        for column, values, size in zip(CUBE_DIMENSIONS, selected_values, self.shape):
+            if not values:
+                selection.append(np.arange(size))
+            else:
+                labels = self.labels[column]
+                selection.append(np.array([labels.index(value) for value in values
+                                           if value in labels],
+                                          dtype=np.intp))
+        return np.ix_(*selection)
+
+    def get_counts(self, column, selection):
+        """Return the non-zero value counts of a column over the selected cells, largest first."""
+        counts = self.value_counts[column][selection].sum(axis=(0, 1, 2, 3))[:-1]
+        counts = pd.Series(counts, index=self.value_labels[column], name='count')
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def summary(self, category_filters, size_filters, location, season, top_n=10):
+        """Return the aggregates in the same shape as DashboardModel.summarize_filters.
+
+        top_items is left out when Item Purchased has too many values to be kept in the cube.
+        """
+        selection = self.selection(category_filters, size_filters, location, season)
+        category_counts = self.get_counts('Category', selection)
+        rating_count = self.rating_counts[selection].sum()
+        summary = {
+            'category_counts': category_counts / category_counts.sum() * 100,
+            'gender_counts': self.get_counts('Gender', selection),
+            'shipping_counts': self.get_counts('Shipping Type', selection),
+            'total_customers': int(self.counts[selection].sum()),
+            'average_rating': (self.rating_sums[selection].sum() / rating_count if rating_count
+                               else float('nan')),
+            'total_purchases': self.amount_sums[selection].sum(),
+        }
+        if 'Item Purchased' in self.value_counts:
+            summary['top_items'] = self.get_counts('Item Purchased', selection).head(top_n)
+        return summary
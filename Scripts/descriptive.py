@@ -0,0 +1,264 @@
+"""
+descriptive.py: Module for one-pass, mergeable descriptive statistics of dataset columns.
+"""
+import numpy as np
+import pandas as pd
+from cube import CUBE_MAX_VALUES, factorize
+
+QUANTILES = (0.25, 0.5, 0.75)
+NUMERIC_STATS = ('count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max')
+CATEGORICAL_STATS = ('count', 'unique', 'top', 'freq')
+
+def is_numeric(series):
+    """Return whether a series is described with moments and quantiles rather than counts."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+def box_stats(quartiles, values, label):
+    """Return the statistics ax.bxp draws for the given quartiles and observed values."""
+    q1, median, q3 = quartiles
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = values[(values >= low) & (values <= high)]
+    return {'label': label, 'q1': q1, 'med': median, 'q3': q3,
+            'whislo': inside.min() if len(inside) else q1,
+            'whishi': inside.max() if len(inside) else q3,
+            'fliers': np.unique(values[(values < low) | (values > high)])}
+
+class Moments:
+    """Class for the count, mean, variance and range of a stream of values.
+
+    Chunks are folded in with the parallel form of Welford's update, so two Moments
+    built over disjoint data merge into the Moments of their union.
+    """
+    def __init__(self):
+        """Initialize Moments with no values."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = float('nan')
+        self.maximum = float('nan')
+
+    def update(self, values):
+        """Add an array of values, ignoring missing ones."""
+        values = values[~np.isnan(values)]
+        if len(values):
+            chunk = Moments()
+            chunk.count = len(values)
+            chunk.mean = float(values.mean())
+            chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+            chunk.minimum, chunk.maximum = float(values.min()), float(values.max())
+            self.merge(chunk)
+
+    def merge(self, other):
+        """Combine the moments of another, disjoint set of values into these."""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def std(self):
+        """Return the sample standard deviation, as pandas reports it."""
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float('nan')
+
+class QuantileSketch:
+    """Class for approximate quantiles in bounded memory, in the style of the KLL sketch.
+
+    Values are kept in levels where an item at level i stands for 2 ** i values. A level
+    that grows past capacity is sorted and every other item is promoted to the next level.
+    """
+    def __init__(self, capacity=256, seed=0):
+        """Initialize QuantileSketch with an empty first level."""
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self.random = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Add an array of values, ignoring missing ones."""
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self.compress()
+
+    def merge(self, other):
+        """Combine the items of another sketch into this one."""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.compress()
+
+    def compress(self):
+        """Halve every level that holds more items than the capacity."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                leftover = len(items) % 2
+                self.levels[level] = items[len(items) - leftover:]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                promoted = items[self.random.integers(2):len(items) - leftover:2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def items(self):
+        """Return the retained items, sorted, and the number of values each stands for."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantiles(self, quantiles):
+        """Return the approximate value at each quantile."""
+        values, weights = self.items()
+        if not len(values):
+            return [float('nan')] * len(quantiles)
+        cumulative = np.cumsum(weights)
+        positions = np.searchsorted(cumulative, np.asarray(quantiles) * cumulative[-1], side='left')
+        return [float(value) for value in values[np.minimum(positions, len(values) - 1)]]
+
+class NumericSummary:
+    """Class for approximate statistics of a numeric column, mergeable across chunks."""
+    numeric = True
+
+    def __init__(self, name=None):
+        """Initialize NumericSummary with empty moments and an empty quantile sketch."""
+        self.name = name
+        self.moments = Moments()
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        """Add an array of values."""
+        values = np.asarray(values, dtype=np.float64)
+        self.moments.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other):
+        """Combine the statistics of another, disjoint set of values into these."""
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    def describe(self):
+        """Return the statistics with the same labels as Series.describe."""
+        moments = self.moments
+        values = [moments.count, moments.mean if moments.count else float('nan'), moments.std(),
+                  moments.minimum] + self.sketch.quantiles(QUANTILES) + [moments.maximum]
+        return pd.Series(values, index=NUMERIC_STATS, name=self.name)
+
+    def box_stats(self):
+        """Return approximate box plot statistics, whiskers and outliers from the sketch items."""
+        values = np.append(self.sketch.items()[0], [self.moments.minimum, self.moments.maximum])
+        return box_stats(self.sketch.quantiles(QUANTILES), values, self.name)
+
+class ValueHistogram:
+    """Class for exact statistics of a column from the count of each of its values."""
+    def __init__(self, labels, counts, numeric, name=None):
+        """Initialize ValueHistogram with distinct values and their counts, without missing ones."""
+        self.labels = labels
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.numeric = numeric
+        self.name = name
+
+    def merge(self, other):
+        """Combine the counts of another histogram over the same values into these."""
+        self.counts = self.counts + other.counts
+
+    def present(self):
+        """Return the values that occur, sorted, and their counts."""
+        occurring = self.counts > 0
+        if not self.numeric:
+            return np.asarray(self.labels, dtype=object)[occurring], self.counts[occurring]
+        values = np.asarray(self.labels, dtype=np.float64)[occurring]
+        order = np.argsort(values)
+        return values[order], self.counts[occurring][order]
+
+    def quantiles(self, quantiles):
+        """Return the value at each quantile, interpolated linearly like Series.quantile."""
+        values, counts = self.present()
+        if not len(values):
+            return [float('nan')] * len(quantiles)
+        cumulative = np.cumsum(counts)
+        result = []
+        for quantile in quantiles:
+            position = (cumulative[-1] - 1) * quantile
+            lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+            upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+            result.append(float(lower + (position - np.floor(position)) * (upper - lower)))
+        return result
+
+    def describe(self):
+        """Return the statistics with the same labels as Series.describe."""
+        values, counts = self.present()
+        total = int(counts.sum())
+        if not self.numeric:
+            top = values[np.argmax(counts)] if total else float('nan')
+            return pd.Series([total, len(values), top, counts.max() if total else float('nan')],
+                             index=CATEGORICAL_STATS, name=self.name)
+        if not total:
+            return pd.Series([0] + [float('nan')] * 7, index=NUMERIC_STATS, name=self.name)
+        mean = float((values * counts).sum() / total)
+        std = float('nan')
+        if total > 1:
+            std = float(((values - mean) ** 2 * counts).sum() / (total - 1)) ** 0.5
+        stats = [total, mean, std, values[0]] + self.quantiles(QUANTILES) + [values[-1]]
+        return pd.Series(stats, index=NUMERIC_STATS, name=self.name)
+
+    def box_stats(self):
+        """Return exact box plot statistics."""
+        return box_stats(self.quantiles(QUANTILES), self.present()[0], self.name)
+
+class ColumnHistogram:
+    """Class holding the value counts of a column for every cell of an aggregation cube."""
+    def __init__(self, cube, series):
+        """Count the values of the series per cube cell."""
+        codes, self.labels = factorize(series)
+        self.name = series.name
+        self.numeric = is_numeric(series)
+        width = len(self.labels) + 1
+        cell_count = int(np.prod(cube.shape))
+        self.counts = np.bincount(cube.cells * width + codes,
+                                  minlength=cell_count * width).reshape(cube.shape + (width,))
+
+    def select(self, selection):
+        """Merge the histograms of the selected cells."""
+        counts = self.counts[selection].sum(axis=(0, 1, 2, 3))[:-1]
+        return ValueHistogram(self.labels, counts, self.numeric, self.name)
+
+class StatisticsIndex:
+    """Class for per-cell column histograms, built the first time each column is described.
+
+    Columns with more than CUBE_MAX_VALUES distinct values are not indexed.
+    """
+    def __init__(self, cube):
+        """Initialize StatisticsIndex over the cells of a cube."""
+        self.cube = cube
+        self.histograms = {}
+
+    def histogram(self, series):
+        """Return the per-cell histogram of a column, or None if it has too many values."""
+        if series.name not in self.histograms:
+            too_many = series.nunique(dropna=False) > CUBE_MAX_VALUES
+            self.histograms[series.name] = None if too_many else ColumnHistogram(self.cube, series)
+        return self.histograms[series.name]
+
+def summarize_values(series, rows, chunk_size):
+    """Summarize the given rows of a series block by block, merging the partial summaries."""
+    if not is_numeric(series):
+        counts = series.iloc[rows].value_counts()
+        counts = counts[counts > 0]
+        return ValueHistogram(list(counts.index), counts.to_numpy(), False, series.name)
+    values = series.to_numpy(dtype=np.float64)
+    summary = NumericSummary(series.name)
+    for start in range(0, len(rows), chunk_size):
+        block = NumericSummary()
+        block.update(values[rows[start:start + chunk_size]])
+        summary.merge(block)
+    return summary
@@ -0,0 +1,72 @@
+"""
+downsample.py: Module for reducing large point sets before they are plotted.
+"""
+import numpy as np
+import pandas as pd
+from descriptive import is_numeric
+
+def plot_values(series):
+    """Return a series as floats for plotting, using category codes for non-numeric values."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64)
+    codes, _ = pd.factorize(series)
+    return codes.astype(np.float64)
+
+def lttb_indices(x, y, threshold):
+    """Return the positions of the points kept by Largest-Triangle-Three-Buckets downsampling."""
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas)) if len(areas) else start
+        selected[bucket + 1] = previous
+    return selected
+
+def density_grid(x, y, bins=100):
+    """Return a 2D histogram of the points and its bin edges, ignoring missing values."""
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return counts, x_edges, y_edges
+
+def unique_pairs(x, y):
+    """Return each distinct (x, y) pair with the number of times it occurs, most frequent first."""
+    pairs = pd.DataFrame({'x': x, 'y': y}).value_counts().reset_index(name='count')
+    pairs = pairs[pairs['count'] > 0]
+    return pairs['x'], pairs['y'], pairs['count'].to_numpy()
+
+def bin_centers(series, bins=100):
+    """Return a numeric series with each value replaced by the center of its histogram bin."""
+    values = series.to_numpy(dtype=np.float64)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return series
+    edges = np.histogram_bin_edges(values[finite], bins=bins)
+    positions = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return pd.Series(np.where(finite, centers[positions], np.nan), index=series.index,
+                     name=series.name)
+
+def budget_pairs(x, y, budget, bins=100):
+    """Return at most budget distinct (x, y) pairs with their counts.
+
+    When there are more pairs than that, the numeric axes are binned first, and if there
+    are still too many only the most frequent pairs are kept.
+    """
+    pairs = unique_pairs(x, y)
+    if len(pairs[2]) > budget:
+        x = bin_centers(x, bins) if is_numeric(x) else x
+        y = bin_centers(y, bins) if is_numeric(y) else y
+        pairs = unique_pairs(x, y)
+    return tuple(values[:budget] for values in pairs)
@@ -0,0 +1,139 @@
+"""
+item_index.py: Module for looking up the rows and statistics of each purchased item.
+"""
+import numpy as np
+from cube import category_codes
+
+HISTOGRAM_COLUMNS = {'popular_colors': 'Color', 'popular_sizes': 'Size'}
+MEAN_COLUMNS = {'average_age': 'Age', 'average_purchase_amount': 'Purchase Amount (USD)',
+                'average_review_rating': 'Review Rating'}
+RATE_COLUMNS = {'subscription_percentage': 'Subscription Status',
+                'discount_applied': 'Discount Applied'}
+
+class ItemIndex:
+    """Class mapping each item to its row positions and computing per-item statistics on demand.
+
+    The rows of all items are kept in one position array ordered by item. Statistics are
+    computed with grouped bincounts over the dataset's own columns and codes, and the
+    unfiltered statistics of an item are memoized on its first lookup.
+    """
+    def __init__(self, df):
+        """Build the item to row positions index over a frame."""
+        self.codes, items = category_codes(df['Item Purchased'])
+        self.items = np.asarray(items, dtype=object)
+        self.positions = {item: code for code, item in enumerate(items)}
+        order = np.argsort(self.codes, kind='stable')
+        self.order = order.astype(np.int32) if len(order) < 2 ** 31 else order
+        counts = np.bincount(self.codes, minlength=len(items) + 1)
+        self.boundaries = np.concatenate([[0], np.cumsum(counts)])
+        self.values = {column: df[column].to_numpy()
+                       for column in list(MEAN_COLUMNS.values()) + list(RATE_COLUMNS.values())}
+        self.histograms = {column: category_codes(df[column])
+                           for column in HISTOGRAM_COLUMNS.values()}
+        self.stats = {}
+
+    def add_rows(self, df):
+        """Index the rows appended to the indexed frame, returning False if its items changed.
+
+        The rows already indexed must be the first rows of df, with the same item labels that
+        new labels may only follow. The position array is merged with the new rows in one
+        linear pass instead of being sorted again, and memoized statistics are kept for items
+        without new rows.
+        """
+        start = len(self.codes)
+        codes, items = category_codes(df['Item Purchased'])
+        old_count = len(self.items)
+        if list(items[:old_count]) != list(self.items):
+            return False
+        new_codes = codes[start:].astype(np.intp)
+        item_count = len(items)
+        groups = np.arange(old_count + 1)
+        groups[old_count] = item_count
+        old_counts = np.zeros(item_count + 1, dtype=np.int64)
+        old_counts[groups] = np.diff(self.boundaries)
+        new_counts = np.bincount(new_codes, minlength=item_count + 1)
+        boundaries = np.concatenate([[0], np.cumsum(old_counts + new_counts)])
+        new_offsets = np.concatenate([[0], np.cumsum(new_counts)[:-1]])
+        new_order = np.argsort(new_codes, kind='stable')
+        old_shift = boundaries[groups] - self.boundaries[:-1]
+        new_shift = boundaries[:-1] + old_counts - new_offsets
+        order = np.empty(len(df), dtype=np.int32 if len(df) < 2 ** 31 else np.intp)
+        order[np.arange(start) + np.repeat(old_shift, np.diff(self.boundaries))] = self.order
+        order[np.arange(len(new_order)) + new_shift[new_codes[new_order]]] = new_order + start
+        changed = {items[code] for code in np.unique(new_codes).tolist() if code < item_count}
+        self.codes = codes
+        self.items = np.asarray(items, dtype=object)
+        self.positions = {item: code for code, item in enumerate(items)}
+        self.order = order
+        self.boundaries = boundaries
+        self.values = {column: df[column].to_numpy() for column in self.values}
+        self.histograms = {column: category_codes(df[column])
+                           for column in HISTOGRAM_COLUMNS.values()}
+        self.stats = {item: stats for item, stats in self.stats.items() if item not in changed}
+        return True
+
+    def item_rows(self, item_name, bitmap=None):
+        """Return the row positions of an item, restricted to the rows set in a packed bitmap."""
+        code = self.positions.get(item_name)
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        rows = self.order[self.boundaries[code]:self.boundaries[code + 1]]
+        if bitmap is None:
+            return rows
+        return rows[(bitmap[rows >> 3] >> (7 - (rows & 7))) & 1 == 1]
+
+    def details(self, item_name, bitmap=None):
+        """Return the insights for an item, memoizing them when nothing is filtered."""
+        if bitmap is not None:
+            return self.stats_for_rows(self.item_rows(item_name, bitmap))
+        if item_name not in self.stats:
+            self.stats[item_name] = self.stats_for_rows(self.item_rows(item_name))
+        return self.stats[item_name]
+
+    def all_details(self, rows):
+        """Return the insights of every item with rows among the given positions, keyed by item."""
+        groups = self.codes[rows]
+        details = self.group_stats(rows, groups, len(self.items) + 1)
+        return {self.items[code]: item_details for code, item_details in details.items()
+                if code < len(self.items)}
+
+    def stats_for_rows(self, rows):
+        """Compute the insights shown on the Products page over the given rows."""
+        return self.group_stats(rows, np.zeros(len(rows), dtype=np.intp), 1, wanted=[0])[0]
+
+    def group_stats(self, rows, groups, group_count, wanted=None):
+        """Compute the insights of each group of rows, groups holding the group number of every row.
+
+        Only the wanted groups are returned, by default those with at least one row.
+        """
+        groups = groups.astype(np.intp, copy=False)
+        counts = np.bincount(groups, minlength=group_count)
+        wanted = np.flatnonzero(counts) if wanted is None else np.asarray(wanted)
+        details = {group: {} for group in wanted.tolist()}
+        for name, column in list(MEAN_COLUMNS.items()) + list(RATE_COLUMNS.items()):
+            values = self.values[column][rows].astype(np.float64)
+            valid = ~np.isnan(values)
+            totals = np.bincount(groups[valid], minlength=group_count)[wanted]
+            sums = np.bincount(groups[valid], weights=values[valid], minlength=group_count)[wanted]
+            scale = 100 if name in RATE_COLUMNS else 1
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.where(totals > 0, sums / totals * scale, np.nan)
+            for group, mean in zip(details, means.tolist()):
+                details[group][name] = mean
+        for name, column in HISTOGRAM_COLUMNS.items():
+            codes, labels = self.histograms[column]
+            width = len(labels) + 1
+            table = np.bincount(groups * width + codes[rows], minlength=group_count * width)
+            table = table.reshape(group_count, width)[wanted, :-1]
+            for group, shares in zip(details, self.shares(table, labels)):
+                details[group][name] = shares
+        return details
+
+    def shares(self, table, labels, limit=5):
+        """Return the top labels of each count table row with their percentages, as dicts."""
+        order = np.argsort(-table, axis=1, kind='stable')[:, :limit]
+        counts = np.take_along_axis(table, order, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percentages = counts / table.sum(axis=1, keepdims=True) * 100
+        return [{labels[code]: percentage for code, count, percentage in zip(*row) if count}
+                for row in zip(order.tolist(), counts.tolist(), percentages.tolist())]
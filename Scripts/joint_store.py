@@ -0,0 +1,128 @@
+"""
+joint_store.py: Module for precomputed pairwise value counts of the dataset columns.
+"""
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from cube import CUBE_MAX_VALUES, category_codes, encode
+
+JOINT_DENSE_CELLS = 1 << 16
+
+class JointTable:
+    """Class for the number of rows holding each pair of values of two columns.
+
+    Counts are kept as a dense 2D array, or as sorted pair keys and counts when the table
+    would have more than JOINT_DENSE_CELLS cells. The last row and column count missing values.
+    """
+    def __init__(self, row_labels, column_labels, counts=None, keys=None, key_counts=None):
+        """Initialize JointTable with either dense counts or sparse pair keys and counts."""
+        self.row_labels = row_labels
+        self.column_labels = column_labels
+        self.shape = (len(row_labels) + 1, len(column_labels) + 1)
+        self.counts = counts
+        self.keys = keys
+        self.key_counts = key_counts
+
+    @classmethod
+    def tally(cls, row_codes, row_labels, column_codes, column_labels):
+        """Count the code pairs of two columns, sparsely if the table would be large."""
+        width = len(column_labels) + 1
+        keys = row_codes.astype(np.intp) * width + column_codes
+        cells = (len(row_labels) + 1) * width
+        if cells <= JOINT_DENSE_CELLS:
+            counts = np.bincount(keys, minlength=cells).reshape(len(row_labels) + 1, width)
+            return cls(row_labels, column_labels, counts=counts)
+        keys, key_counts = np.unique(keys, return_counts=True)
+        return cls(row_labels, column_labels, keys=keys, key_counts=key_counts)
+
+    def merge(self, other):
+        """Return a table with the counts of another table over the same labels added."""
+        if self.counts is not None:
+            return JointTable(self.row_labels, self.column_labels,
+                              counts=self.counts + other.counts)
+        keys, inverse = np.unique(np.concatenate([self.keys, other.keys]), return_inverse=True)
+        key_counts = np.bincount(inverse, weights=np.concatenate([self.key_counts,
+                                                                  other.key_counts]))
+        return JointTable(self.row_labels, self.column_labels, keys=keys,
+                          key_counts=key_counts.astype(np.int64))
+
+    def dense(self):
+        """Return the counts as a dense 2D array."""
+        if self.counts is not None:
+            return self.counts
+        counts = np.zeros(self.shape[0] * self.shape[1], dtype=np.int64)
+        counts[self.keys] = self.key_counts
+        return counts.reshape(self.shape)
+
+    def transpose(self):
+        """Return the table with its rows and columns swapped."""
+        if self.counts is not None:
+            return JointTable(self.column_labels, self.row_labels, counts=self.counts.T)
+        rows, columns = np.divmod(self.keys, self.shape[1])
+        keys = columns * self.shape[0] + rows
+        order = np.argsort(keys)
+        return JointTable(self.column_labels, self.row_labels, keys=keys[order],
+                          key_counts=self.key_counts[order])
+
+    def to_frame(self):
+        """Return the non-missing value pair counts as a crosstab, without empty rows or columns."""
+        frame = pd.DataFrame(self.dense()[:-1, :-1], index=pd.Index(self.row_labels),
+                             columns=pd.Index(self.column_labels))
+        return frame.loc[frame.sum(axis=1) > 0, frame.sum(axis=0) > 0]
+
+class JointStore:
+    """Class holding a JointTable for every pair of columns with at most CUBE_MAX_VALUES values.
+
+    The codes of each column are kept for counting filtered rows, in the smallest integer dtype
+    that holds them; categorical columns share the codes of the dataset itself.
+    """
+    def __init__(self, columns, max_workers=None):
+        """Encode the given display columns and count every pair of them on a thread pool."""
+        self.codes = {}
+        self.labels = {}
+        for name, series in columns.items():
+            codes, labels = category_codes(series)
+            if len(labels) <= CUBE_MAX_VALUES:
+                self.codes[name], self.labels[name] = codes, labels
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        pairs = list(itertools.combinations(self.codes, 2))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            self.tables = dict(zip(pairs, pool.map(lambda pair: self.tally(*pair), pairs)))
+
+    def tally(self, row_column, column_column, rows=None):
+        """Count the value pairs of two columns, over all rows or only the given row positions."""
+        row_codes, column_codes = self.codes[row_column], self.codes[column_column]
+        if rows is not None:
+            row_codes, column_codes = row_codes[rows], column_codes[rows]
+        return JointTable.tally(row_codes, self.labels[row_column], column_codes,
+                                self.labels[column_column])
+
+    def table(self, row_column, column_column, rows=None):
+        """Return the joint counts of two columns, from the store when all rows are wanted.
+
+        A column paired with itself has no stored table and is counted from its codes.
+        """
+        if rows is not None or row_column == column_column:
+            return self.tally(row_column, column_column, rows)
+        if (row_column, column_column) in self.tables:
+            return self.tables[(row_column, column_column)]
+        return self.tables[(column_column, row_column)].transpose()
+
+    def add_rows(self, columns):
+        """Count appended display columns into every table, returning False on a new value."""
+        new_codes = {}
+        for name in self.codes:
+            new_codes[name] = encode(columns[name], self.labels[name])
+            if new_codes[name] is None:
+                return False
+        tables = {}
+        for (row_column, column_column), table in self.tables.items():
+            added = JointTable.tally(new_codes[row_column], self.labels[row_column],
+                                     new_codes[column_column], self.labels[column_column])
+            tables[(row_column, column_column)] = table.merge(added)
+        self.codes = {name: np.concatenate([codes, new_codes[name].astype(codes.dtype)])
+                      for name, codes in self.codes.items()}
+        self.tables = tables
+        return True
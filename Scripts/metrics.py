@@ -0,0 +1,94 @@
+"""
+metrics.py: Module for timing the dashboard's hot paths and exporting the collected timings.
+"""
+import csv
+import functools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import numpy as np
+
+ROLLING_SAMPLES = 500
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+class Metrics:
+    """Class for collecting the durations of named timing spans, keeping ROLLING_SAMPLES of each."""
+    def __init__(self, samples=ROLLING_SAMPLES):
+        """Initialize Metrics with no spans."""
+        self.samples = samples
+        self.durations = defaultdict(lambda: deque(maxlen=self.samples))
+        self.totals = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Record one duration of a span."""
+        with self.lock:
+            self.durations[name].append(seconds * 1000)
+            self.totals[name] += 1
+
+    def clear(self):
+        """Forget every recorded duration."""
+        with self.lock:
+            self.durations.clear()
+            self.totals.clear()
+
+    @contextmanager
+    def span(self, name):
+        """Time the body of a with block as a span."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def summary(self):
+        """Return the call count and rolling latency percentiles of every span, in milliseconds."""
+        with self.lock:
+            durations = {name: np.array(values) for name, values in self.durations.items()}
+            totals = dict(self.totals)
+        summary = {}
+        for name, values in sorted(durations.items()):
+            summary[name] = {'calls': totals[name], 'mean_ms': float(values.mean()),
+                             'p50_ms': float(np.percentile(values, 50)),
+                             'p95_ms': float(np.percentile(values, 95)),
+                             'max_ms': float(values.max())}
+        return summary
+
+    def histogram(self, name):
+        """Return the rolling durations of a span counted into LATENCY_BUCKETS_MS by upper bound."""
+        with self.lock:
+            values = np.array(self.durations.get(name, ()))
+        counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, values),
+                             minlength=len(LATENCY_BUCKETS_MS) + 1)
+        labels = [f'<={bound}' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}']
+        return dict(zip(labels, counts.tolist()))
+
+    def export(self, path):
+        """Write the span summary and rolling durations to a .csv file, or as JSON otherwise."""
+        with self.lock:
+            durations = {name: list(values) for name, values in self.durations.items()}
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='', encoding='utf-8') as metrics_file:
+                writer = csv.writer(metrics_file)
+                writer.writerow(['span', 'sample', 'duration_ms'])
+                for name, values in sorted(durations.items()):
+                    writer.writerows([name, sample, value] for sample, value in enumerate(values))
+            return
+        report = {'spans': self.summary(), 'refresh_histogram': self.histogram('refresh'),
+                  'durations': durations}
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            json.dump(report, metrics_file, indent=2)
+
+metrics = Metrics()
+
+def timed(name):
+    """Decorate a function so that every call is recorded as a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with metrics.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,16 +1,79 @@
 """
 model.py: Module for managing and processing data.
 """
+import copy
+import io
 import os
+import threading
+import numpy as np
 import pandas as pd
-from PIL import Image, ImageTk
+from PIL import Image
+from column_store import ColumnStore
+from partitions import PartitionedDataset
+from aggregates import RunningAggregates
+from cube import AggregateCube
+from descriptive import StatisticsIndex, summarize_values
+from item_index import ItemIndex
+from joint_store import JointStore
+from query import Query
+from metrics import timed
+from result_cache import ResultCache, filter_key
+
+DATASET_COLUMNS = ('Customer ID', 'Age', 'Gender', 'Item Purchased', 'Category',
+                   'Purchase Amount (USD)', 'Location', 'Size', 'Color', 'Season', 'Review Rating',
+                   'Subscription Status', 'Shipping Type', 'Discount Applied', 'Promo Code Used',
+                   'Previous Purchases', 'Payment Method', 'Frequency of Purchases')
+FILTER_COLUMNS = ('Category', 'Size', 'Location', 'Season')
+CATEGORICAL_COLUMNS = ('Gender', 'Item Purchased', 'Category', 'Location', 'Size', 'Color',
+                       'Season', 'Shipping Type', 'Payment Method', 'Frequency of Purchases')
+BOOLEAN_COLUMNS = ('Subscription Status', 'Discount Applied', 'Promo Code Used')
+NUMERIC_DTYPES = {'Customer ID': 'int32', 'Age': 'int8', 'Purchase Amount (USD)': 'int32',
+                  'Review Rating': 'float64', 'Previous Purchases': 'int16'}
+STREAMING_THRESHOLD = 64 * 1024 * 1024
+CHUNK_SIZE = 100000
+UNFILTERED_KEY = ((), (), 'All', 'All')
+
+def compact_numeric(series, dtype):
+    """Return a parsed numeric column as a compact dtype, or unchanged if its values do not fit.
+
+    Integer columns with blank cells are parsed as floats and stay float64.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return series.astype(dtype) if series.dtype.kind in 'fiu' else series
+    if series.dtype.kind not in 'iu':
+        return series
+    limits = np.iinfo(dtype)
+    if len(series) and (series.min() < limits.min or series.max() > limits.max):
+        return series
+    return series.astype(dtype)
+
+def append_bits(bitmap, count, bits):
+    """Return a packed bitmap holding count bits with a boolean array of bits appended."""
+    head = bitmap[:count // 8]
+    partial = np.unpackbits(bitmap[count // 8:], count=count % 8)
+    return np.concatenate([head, np.packbits(np.concatenate([partial, bits]))])
 
 class DashboardModel:
     """Class for loading and filtering dataset."""
-    def __init__(self):
-        """Initialize DashboardModel with data from a CSV file."""
+    def __init__(self, dataset=None, selections=()):
+        """Initialize DashboardModel from a CSV file or a folder of partition files.
+
+        The bundled dataset is loaded by default.
+
+        selections are (column, values) pairs restricting the loaded rows to those holding one
+        of the values in every column; partition files that cannot hold such rows are not read.
+        """
         self.setup_directories()
-        self.df = pd.read_csv(self.dataset)
+        if dataset is not None:
+            self.dataset = dataset
+        self.selections = tuple((column, values) for column, values in selections if values)
+        self.streaming = False
+        self.tail_offset = None
+        self.result_cache = ResultCache()
+        self.lock = threading.RLock()
+        self.df = self.load_dataset(self.dataset)
+        self.refresh_indexes()
 
     def setup_directories(self):
         """Set up directories."""
@@ -19,21 +82,435 @@ class DashboardModel:
         self.dataset_folder = os.path.join(parent_directory, 'Dataset')
         self.dataset = os.path.join(self.dataset_folder, 'shopping_trends_updated.csv')
 
+    @timed('model.load_dataset')
+    def load_dataset(self, path):
+        """Load a dataset from its binary column cache, parsing the CSV only if the cache is stale.
+
+        Files larger than STREAMING_THRESHOLD are streamed instead: only the first chunk is
+        returned here and the rest is read through the stream until finish_streaming is called.
+        A folder is loaded as a partitioned dataset, one cached file per partition. When the
+        model has selections, a file is neither streamed nor tailed; otherwise tailing starts
+        right after the last complete line that was loaded.
+        """
+        if os.path.isdir(path):
+            self.partitioned = PartitionedDataset(path, self.load_file, DATASET_COLUMNS)
+            return self.load_partitions(self.selections)
+        self.partitioned = None
+        self.store = ColumnStore(path)
+        df = self.store.load()
+        if df is None and os.path.getsize(path) > STREAMING_THRESHOLD and not self.selections:
+            return self.start_streaming(path)
+        if df is not None:
+            size = self.store.source_size
+        else:
+            df, size = self.read_complete_lines(path)
+            if size == os.path.getsize(path):
+                self.store.save(df)
+        if self.selections:
+            return self.select_rows(df, self.selections)
+        self.tail_offset = size
+        return df
+
+    def load_file(self, path):
+        """Load one CSV file from its binary column cache, parsing it only if the cache is stale."""
+        store = ColumnStore(path)
+        df = store.load()
+        if df is None:
+            df = self.read_csv(path)
+            store.save(df)
+        return df
+
+    def load_partitions(self, selections):
+        """Return the rows matching (column, values) selections, reading only needed partitions."""
+        df = self.partitioned.load(selections)
+        if df is None:
+            raise FileNotFoundError(
+                f"No CSV files matching the selections found in {self.partitioned.folder}")
+        return self.restore_categories(self.select_rows(df, selections))
+
+    def select_rows(self, df, selections):
+        """Return the rows of a frame holding one of the selected values in each selected column."""
+        mask = np.ones(len(df), dtype=bool)
+        for column, values in selections:
+            mask &= df[column].isin(self.stored_values(column, values)).to_numpy()
+        return df if mask.all() else df[mask].reset_index(drop=True)
+
+    def restore_categories(self, df):
+        """Convert the categorical columns of a frame concatenated from parts back to categories."""
+        for column in CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        return df
+
+    def schema_dtypes(self):
+        """Return the dtypes to parse the columns with; numeric ones are compacted after parsing."""
+        return {column: 'category' for column in CATEGORICAL_COLUMNS}
+
+    def apply_schema(self, df):
+        """Downcast the numeric columns of a parsed frame where they fit; make Yes/No booleans."""
+        for column, dtype in NUMERIC_DTYPES.items():
+            if column in df.columns:
+                df[column] = compact_numeric(df[column], dtype)
+        for column in BOOLEAN_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column] == 'Yes'
+        return df
+
+    def read_csv(self, path):
+        """Parse a CSV file using the compact typed schema of the shopping dataset."""
+        return self.apply_schema(pd.read_csv(path, dtype=self.schema_dtypes()))
+
+    def read_complete_lines(self, path):
+        """Parse the complete lines of a CSV file and return the rows and the bytes they span.
+
+        A last line that is still being written is left for read_appended to pick up.
+        """
+        with open(path, 'rb') as dataset_file:
+            data = dataset_file.read()
+        end = data.rfind(b'\n') + 1
+        return self.apply_schema(pd.read_csv(io.BytesIO(data[:end]),
+                                             dtype=self.schema_dtypes())), end
+
+    def iter_chunks(self, path, chunksize=CHUNK_SIZE):
+        """Yield the rows of a CSV file in typed chunks."""
+        for chunk in pd.read_csv(path, dtype=self.schema_dtypes(), chunksize=chunksize):
+            yield self.apply_schema(chunk)
+
+    def start_streaming(self, path):
+        """Read the first chunk of a CSV file and keep a stream open for the remaining chunks."""
+        self.streaming = True
+        self.stream = self.iter_chunks(path)
+        self.chunks = []
+        self.running_aggregates = RunningAggregates()
+        first_chunk = next(self.stream)
+        self.add_chunk(first_chunk)
+        return first_chunk
+
+    def add_chunk(self, chunk):
+        """Add a streamed chunk to the running aggregates."""
+        self.chunks.append(chunk)
+        self.running_aggregates.update(chunk)
+
+    @timed('model.assemble_streamed')
+    def assemble_streamed(self):
+        """Concatenate the streamed chunks, cache it and build its indexes, off the Tk thread.
+
+        Returns the indexes for finish_streaming to swap in.
+        """
+        df = self.restore_categories(pd.concat(self.chunks, ignore_index=True))
+        self.store.save(df)
+        return self.build_indexes(df)
+
+    def finish_streaming(self, indexes):
+        """Swap in the indexes of the assembled dataset and stop streaming."""
+        self.swap_indexes(indexes)
+        self.chunks = []
+        self.stream = None
+        self.streaming = False
+
+    def has_appended_rows(self):
+        """Check whether the dataset file has grown since it was last read."""
+        return self.tail_offset is not None and os.path.getsize(self.dataset) != self.tail_offset
+
+    @timed('model.read_appended')
+    def read_appended(self):
+        """Parse the complete lines appended to the dataset file since it was last read.
+
+        Only the new bytes are read. Tailing stops if the file shrinks, as it was not appended to.
+        """
+        with open(self.dataset, 'rb') as dataset_file:
+            header = dataset_file.readline()
+            dataset_file.seek(0, os.SEEK_END)
+            if dataset_file.tell() < self.tail_offset:
+                self.tail_offset = None
+                return None
+            dataset_file.seek(self.tail_offset)
+            data = dataset_file.read()
+        end = data.rfind(b'\n') + 1
+        if not data[:end].strip():
+            return None
+        self.tail_offset += end
+        return self.apply_schema(pd.read_csv(io.BytesIO(header + data[:end]),
+                                             dtype=self.schema_dtypes()))
+
+    def tail_appended(self):
+        """Read the rows appended to the dataset file and swap in a dataset and indexes with them.
+
+        Meant for a worker thread. Returns the number of rows added.
+        """
+        chunk = self.read_appended()
+        if chunk is None or chunk.empty:
+            return 0
+        self.swap_indexes(self.append_rows(chunk))
+        return len(chunk)
+
+    @timed('model.append_rows')
+    def append_rows(self, chunk):
+        """Return the dataset grown by appended rows and its indexes, for swap_indexes.
+
+        The current frame and indexes are left untouched so that readers never see them half
+        updated. The filter index, cube, joint store and item index are extended from copies and
+        only rebuilt when the rows bring a value they have no slot for.
+        """
+        dtypes = {}
+        for column in CATEGORICAL_COLUMNS:
+            if column in chunk.columns:
+                categories = self.df[column].cat.categories
+                added = pd.Index(chunk[column].dropna().unique()).difference(categories)
+                categories = categories.append(added)
+                dtypes[column] = pd.CategoricalDtype(categories)
+        chunk = chunk.astype(dtypes)
+        df = pd.concat([self.df.astype(dtypes), chunk], ignore_index=True)
+        cube = copy.copy(self.cube)
+        if not cube.add_rows(chunk):
+            cube = AggregateCube(df)
+        joint_store = copy.copy(self.joint_store)
+        if not joint_store.add_rows(self.display_columns(chunk)):
+            joint_store = JointStore(self.display_columns(df))
+        item_index = copy.copy(self.item_index)
+        if not item_index.add_rows(df):
+            item_index = ItemIndex(df)
+        return {'df': df, 'filter_index': self.extend_filter_index(chunk), 'cube': cube,
+                'stats_index': StatisticsIndex(cube), 'item_index': item_index,
+                'joint_store': joint_store}
+
+    def refresh_indexes(self):
+        """Rebuild every index of the current dataset and drop cached results."""
+        self.swap_indexes(self.build_indexes(self.df))
+
+    @timed('model.build_indexes')
+    def build_indexes(self, df):
+        """Build the filter index, cube, statistics index, item index and joint store of a frame."""
+        cube = AggregateCube(df)
+        return {'df': df, 'filter_index': self.build_filter_index(df), 'cube': cube,
+                'stats_index': StatisticsIndex(cube), 'item_index': ItemIndex(df),
+                'joint_store': JointStore(self.display_columns(df))}
+
+    def swap_indexes(self, indexes):
+        """Replace the dataset and its indexes with ones from build_indexes and drop cached results.
+
+        Holds the model lock, so a computation holding it sees either the old or the new set.
+        """
+        with self.lock:
+            self.df = indexes['df']
+            self.filter_index = indexes['filter_index']
+            self.cube = indexes['cube']
+            self.stats_index = indexes['stats_index']
+            self.item_index = indexes['item_index']
+            self.joint_store = indexes['joint_store']
+            self.row_count = len(self.df)
+            self.empty_bitmap = np.zeros((self.row_count + 7) // 8, dtype=np.uint8)
+            self.result_cache.clear()
+
+    def memory_footprint(self):
+        """Return the resident size of each column in bytes, plus the total."""
+        footprint = self.df.memory_usage(index=False, deep=True).to_dict()
+        footprint['Total'] = sum(footprint.values())
+        return footprint
+
+    def value_counts(self, series, normalize=False):
+        """Count the values of a series, leaving out categories absent from the data."""
+        counts = series.value_counts()
+        counts = counts[counts > 0]
+        if normalize:
+            counts = counts / counts.sum()
+        return counts
+
+    def summarize_filters(self, category_filters, size_filters, location, season, top_n=10):
+        """Compute the Home and Products aggregates for the given filters from the cube."""
+        key = ('summary', filter_key(category_filters, size_filters, location, season), top_n)
+        return self.result_cache.get_or_compute(
+            key, lambda: self.compute_summary(category_filters, size_filters, location, season,
+                                              top_n))
+
+    @timed('model.compute_summary')
+    def compute_summary(self, category_filters, size_filters, location, season, top_n):
+        """Compute the summary from the cube, counting top items from the rows when needed."""
+        with self.lock:
+            summary = self.cube.summary(category_filters, size_filters, location, season, top_n)
+            if 'top_items' not in summary:
+                rows = self.filter_rows(category_filters, size_filters, location, season)
+                summary['top_items'] = self.count_top_items(rows, top_n)
+        summary['top_items_accuracy'] = {'mode': 'Exact', 'total': summary['total_customers'],
+                                         'max_error': 0, 'confidence': 1.0}
+        return summary
+
+    def count_top_items(self, rows, top_n):
+        """Count the items of the rows exactly with a bincount and pick the top with argpartition.
+
+        The approximate top-K counters are only used while a large file is streamed in.
+        """
+        items = self.item_index.items
+        counts = np.bincount(self.item_index.codes[rows], minlength=len(items) + 1)[:-1]
+        top = np.arange(len(counts))
+        if len(counts) > top_n:
+            top = np.argpartition(-counts, top_n)[:top_n]
+        top = top[counts[top] > 0]
+        top = top[np.lexsort((top, -counts[top]))]
+        return pd.Series(counts[top], index=items[top], name='count')
+
+    def item_details(self, item_name, category_filters, size_filters, location, season):
+        """Compute the Products page insights for one item within the given filters."""
+        key = ('item', filter_key(category_filters, size_filters, location, season), item_name)
+        return self.result_cache.get_or_compute(
+            key, lambda: self.compute_item_details(item_name, category_filters, size_filters,
+                                                   location, season))
+
+    @timed('model.compute_item_details')
+    def compute_item_details(self, item_name, category_filters, size_filters, location, season):
+        """Compute the insights for one item from its indexed rows that match the filters."""
+        with self.lock:
+            bitmap = self.filter_bitmap(category_filters, size_filters, location, season)
+            return self.item_index.details(item_name, bitmap)
+
+    def column_summary(self, column, category_filters, size_filters, location, season):
+        """Return the mergeable statistics of a display column over the rows matching filters."""
+        key = ('column_summary', column,
+               filter_key(category_filters, size_filters, location, season))
+        return self.result_cache.get_or_compute(
+            key, lambda: self.compute_column_summary(column, category_filters, size_filters,
+                                                     location, season))
+
+    @timed('model.compute_column_summary')
+    def compute_column_summary(self, column, category_filters, size_filters, location, season):
+        """Merge the per-cell histograms of a column, or summarize its rows if it is unindexed."""
+        with self.lock:
+            series = self.get_column(column)
+            histogram = self.stats_index.histogram(series)
+            if histogram is not None:
+                return histogram.select(self.cube.selection(category_filters, size_filters,
+                                                            location, season))
+            rows = self.filter_rows(category_filters, size_filters, location, season)
+            return summarize_values(series, rows, CHUNK_SIZE)
+
+    def describe_columns(self, columns, category_filters, size_filters, location, season):
+        """Return describe-style statistics of display columns over the rows matching filters."""
+        summaries = [self.column_summary(column, category_filters, size_filters, location, season)
+                     for column in columns]
+        if len(summaries) == 1:
+            return summaries[0].describe()
+        numeric = [summary for summary in summaries if summary.numeric]
+        return pd.concat([summary.describe() for summary in numeric or summaries], axis=1)
+
+    def query(self):
+        """Start a lazy query over the columns of the dataset."""
+        return Query(self)
+
+    def joint_table(self, row_column, column_column, category_filters, size_filters, location,
+                    season):
+        """Return the joint value counts of two display columns over the rows matching filters."""
+        key = ('joint', row_column, column_column,
+               filter_key(category_filters, size_filters, location, season))
+        return self.result_cache.get_or_compute(
+            key, lambda: self.compute_joint_table(row_column, column_column,
+                                                  category_filters, size_filters, location, season))
+
+    @timed('model.compute_joint_table')
+    def compute_joint_table(self, row_column, column_column, category_filters, size_filters,
+                            location, season):
+        """Read the joint counts from the store, or count them over the rows when filtered."""
+        with self.lock:
+            rows = None
+            if self.filter_bitmap(category_filters, size_filters, location, season) is not None:
+                rows = self.filter_rows(category_filters, size_filters, location, season)
+            return self.joint_store.table(row_column, column_column, rows)
+
+    def has_joint_table(self, column):
+        """Check whether a column has few enough distinct values to be kept in the joint store."""
+        return column in self.joint_store.codes
+
+    def display_series(self, series):
+        """Return a series for display, with boolean flags shown as Yes/No."""
+        if series.name in BOOLEAN_COLUMNS:
+            series = series.map({True: 'Yes', False: 'No'}).astype('category')
+        return series
+
+    def stored_values(self, column, values):
+        """Translate values of a column as displayed back to stored values, Yes/No to booleans."""
+        if column not in BOOLEAN_COLUMNS:
+            return list(values)
+        return [{'Yes': True, 'No': False}.get(value, value) for value in values]
+
+    def display_columns(self, df):
+        """Return every column of a frame for display."""
+        return {column: self.display_series(df[column]) for column in df.columns}
+
+    def get_column(self, column):
+        """Return a column for display, with boolean flags shown as Yes/No."""
+        return self.display_series(self.df[column])
+
+
+    def build_filter_index(self, df):
+        """Return a packed bitmap of a frame's rows for every value of each filter column."""
+        filter_index = {}
+        for column in FILTER_COLUMNS:
+            codes, uniques = pd.factorize(df[column])
+            filter_index[column] = {value: np.packbits(codes == code)
+                                    for code, value in enumerate(uniques)}
+        return filter_index
+
+    def extend_filter_index(self, chunk):
+        """Return a filter index with the bits of new rows appended to each current bitmap."""
+        count = self.row_count
+        filter_index = {}
+        for column in FILTER_COLUMNS:
+            values = chunk[column].to_numpy(dtype=object)
+            bitmaps = dict(self.filter_index[column])
+            for value in pd.unique(chunk[column].dropna().to_numpy(dtype=object)):
+                bitmaps.setdefault(value, np.zeros((count + 7) // 8, dtype=np.uint8))
+            filter_index[column] = {value: append_bits(bitmap, count, values == value)
+                                    for value, bitmap in bitmaps.items()}
+        return filter_index
+
+    def filter_bitmap(self, category_filters, size_filters, location, season):
+        """Combine the index bitmaps of the given filters, or return None if nothing is filtered."""
+        selections = (('Category', category_filters), ('Size', size_filters),
+                      ('Location', [] if location == 'All' else [location]),
+                      ('Season', [] if season == 'All' else [season]))
+        return self.selection_bitmap(selections)
+
+    def selection_bitmap(self, selections):
+        """Combine the index bitmaps of (column, values) selections, or return None if none do."""
+        bitmap = None
+        for column, values in selections:
+            if not values:
+                continue
+            column_bitmap = self.empty_bitmap
+            for value in values:
+                column_bitmap = column_bitmap | self.filter_index[column].get(value,
+                                                                              self.empty_bitmap)
+            bitmap = column_bitmap if bitmap is None else bitmap & column_bitmap
+        return bitmap
+
+    def bitmap_rows(self, bitmap):
+        """Convert a packed bitmap into an array of row positions."""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.row_count))
+
+    def filter_rows(self, category_filters, size_filters, location, season):
+        """Return the positions of the rows matching the given filters."""
+        key = ('rows', filter_key(category_filters, size_filters, location, season))
+        return self.result_cache.get_or_compute(
+            key, lambda: self.compute_filter_rows(category_filters, size_filters, location, season))
+
+    @timed('model.compute_filter_rows')
+    def compute_filter_rows(self, category_filters, size_filters, location, season):
+        """Compute the positions of the rows matching the given filters from the bitmap index."""
+        with self.lock:
+            bitmap = self.filter_bitmap(category_filters, size_filters, location, season)
+            if bitmap is None:
+                return np.arange(self.row_count)
+            return self.bitmap_rows(bitmap)
+
     def filter_data(self, category_filters, size_filters, location, season):
-        """Filter data based on given filters."""
-        filtered_df = self.df.copy()
-        if category_filters:
-            filtered_df = filtered_df[filtered_df['Category'].isin(category_filters)]
-        if size_filters:
-            filtered_df = filtered_df[filtered_df['Size'].isin(size_filters)]
-        if location != 'All':
-            filtered_df = filtered_df[filtered_df['Location'] == location]
-        if season != 'All':
-            filtered_df = filtered_df[filtered_df['Season'] == season]
-        return filtered_df
+        """Filter data based on given filters without copying the full dataset."""
+        with self.lock:
+            if filter_key(category_filters, size_filters, location, season) == UNFILTERED_KEY:
+                return self.df
+            return self.df.iloc[self.filter_rows(category_filters, size_filters, location, season)]
 
     def load_image(self, filename):
         """Load image from a specified folder."""
+        from PIL import ImageTk  # pylint: disable=import-outside-toplevel
         current_directory = os.path.dirname(__file__)
         parent_directory = os.path.dirname(current_directory)
         image_folder = os.path.join(parent_directory, 'Images')
@@ -44,5 +521,5 @@ class DashboardModel:
 
     def get_row_by_item_name(self, item_name):
         """Retrieve the row corresponding to the given item_name."""
-        row = self.df[self.df['Item Purchased'] == item_name]
-        return row if not row.empty else None
+        rows = self.item_index.item_rows(item_name)
+        return self.df.iloc[rows] if len(rows) else None
@@ -0,0 +1,69 @@
+"""
+partitions.py: Module for loading a dataset split into partition files, like daily drops per region.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+def partition_values(relative_path):
+    """Return the column=value pairs named by the folders and file name of a partition path."""
+    parts = relative_path.split(os.sep)
+    parts[-1] = os.path.splitext(parts[-1])[0]
+    values = {}
+    for part in parts:
+        column, separator, value = part.partition('=')
+        if separator:
+            values[column] = value
+    return values
+
+class PartitionedDataset:
+    """Class for a folder of CSV files partitioned by column values, e.g. Location=Ohio/2024-06.csv.
+
+    Partitions whose path values cannot match a selection are skipped without being opened.
+    Loaded partitions are not kept once their rows are concatenated.
+    """
+    def __init__(self, folder, load_file, column_order=(), max_workers=None):
+        """Initialize PartitionedDataset by listing the CSV files under a folder.
+
+        column_order gives the position to insert a column named only by the partition paths at.
+        """
+        self.folder = folder
+        self.load_file = load_file
+        self.column_order = list(column_order)
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.partitions = {}
+        for root, _, filenames in os.walk(folder):
+            for filename in sorted(filenames):
+                if filename.endswith('.csv'):
+                    path = os.path.join(root, filename)
+                    self.partitions[path] = partition_values(os.path.relpath(path, folder))
+
+    def matching(self, selections=()):
+        """Return the partition files that can hold rows matching (column, values) selections."""
+        paths = []
+        for path, values in sorted(self.partitions.items()):
+            if all(not selected or column not in values or values[column] in selected
+                   for column, selected in selections):
+                paths.append(path)
+        return paths
+
+    def load_partition(self, path):
+        """Load one partition file, adding the columns named by its path that it leaves out."""
+        df = self.load_file(path)
+        for column, value in self.partitions[path].items():
+            if column in df.columns:
+                continue
+            position = len(df.columns)
+            if column in self.column_order:
+                preceding = set(self.column_order[:self.column_order.index(column)])
+                position = sum(1 for name in df.columns if name in preceding)
+            df.insert(position, column, value)
+        return df
+
+    def load(self, selections=()):
+        """Load the partitions matching the selections in parallel and return all their rows."""
+        paths = self.matching(selections)
+        if not paths:
+            return None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return pd.concat(executor.map(self.load_partition, paths), ignore_index=True)
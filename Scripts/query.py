@@ -0,0 +1,108 @@
+"""
+query.py: Module for lazily planned queries over the columns of the dashboard dataset.
+"""
+import numpy as np
+import pandas as pd
+from metrics import timed
+
+class Query:
+    """Class for building a query step by step and running it over only the columns it needs.
+
+    Nothing is read until execute(). Predicates on indexed filter columns are answered from
+    the bitmap index, other predicates are evaluated on their own column over the remaining
+    rows, and only the selected, grouped and aggregated columns are gathered at those rows.
+    """
+    def __init__(self, model):
+        """Initialize Query with no selection, predicates, grouping or limit."""
+        self.model = model
+        self.columns = []
+        self.predicates = []
+        self.groups = []
+        self.aggregates = {}
+        self.limit = None
+        self.order_by = None
+
+    def select(self, *columns):
+        """Add columns to the result."""
+        self.columns.extend(columns)
+        return self
+
+    def where(self, column, values):
+        """Keep only the rows whose value in a column is one of the given ones, shown or stored."""
+        self.predicates.append((column, self.model.stored_values(column, values)))
+        return self
+
+    def filter(self, category_filters, size_filters, location, season):
+        """Keep only the rows matching the sidebar filters."""
+        selections = (('Category', category_filters), ('Size', size_filters),
+                      ('Location', [] if location == 'All' else [location]),
+                      ('Season', [] if season == 'All' else [season]))
+        for column, values in selections:
+            if values:
+                self.where(column, values)
+        return self
+
+    def group_by(self, *columns):
+        """Group the result by columns, counting the rows of each group unless given aggregates."""
+        self.groups.extend(columns)
+        return self
+
+    def aggregate(self, **aggregates):
+        """Add named aggregates, each given as a (column, function) pair as in DataFrame.agg."""
+        self.aggregates.update(aggregates)
+        return self
+
+    def top(self, count, by=None):
+        """Keep the count largest results by a column, or the first count results without one."""
+        self.limit = count
+        self.order_by = by
+        return self
+
+    def plan(self):
+        """Split predicates between the bitmap index and column scans; list the columns to read."""
+        indexed = [(column, values) for column, values in self.predicates
+                   if column in self.model.filter_index]
+        scanned = [(column, values) for column, values in self.predicates
+                   if column not in self.model.filter_index]
+        needed = list(self.columns) + list(self.groups)
+        needed += [column for column, _ in self.aggregates.values()]
+        return {'indexed': indexed, 'scanned': scanned, 'columns': list(dict.fromkeys(needed))}
+
+    def rows(self, plan):
+        """Return the positions of the rows satisfying every predicate, or None if all rows do."""
+        bitmap = self.model.selection_bitmap(plan['indexed'])
+        rows = None if bitmap is None else self.model.bitmap_rows(bitmap)
+        for column, values in plan['scanned']:
+            series = self.model.df[column] if rows is None else self.model.df[column].iloc[rows]
+            matches = np.flatnonzero(series.isin(values).to_numpy())
+            rows = matches if rows is None else rows[matches]
+        return rows
+
+    @timed('query.execute')
+    def execute(self):
+        """Run the query, returning a Series for one selected column and a DataFrame otherwise."""
+        with self.model.lock:
+            plan = self.plan()
+            rows = self.rows(plan)
+            frame = {}
+            for column in plan['columns']:
+                series = self.model.df[column] if rows is None else self.model.df[column].iloc[rows]
+                frame[column] = self.model.display_series(series)
+        if self.groups:
+            grouped = pd.DataFrame(frame).groupby(self.groups, observed=True, sort=False)
+            result = grouped.agg(**self.aggregates) if self.aggregates else grouped.size()
+        elif self.aggregates:
+            result = pd.Series({name: frame[column].agg(function)
+                                for name, (column, function) in self.aggregates.items()})
+        elif len(self.columns) == 1:
+            result = frame[self.columns[0]]
+        else:
+            result = pd.concat([frame[column] for column in self.columns], axis=1)
+        if self.limit is not None:
+            if self.order_by is None:
+                result = result.head(self.limit)
+            elif isinstance(result, pd.Series):
+                result = result.nlargest(self.limit)
+            else:
+                result = result.nlargest(self.limit, self.order_by)
+        return result
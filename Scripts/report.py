@@ -0,0 +1,161 @@
+"""
+report.py: Headless batch report engine for computing dashboard aggregates without tkinter.
+
+Example:
+    python report.py --output reports --dimensions Location Season --png
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from model import DashboardModel, FILTER_COLUMNS
+
+REPORT_DIMENSIONS = ('Location', 'Season')
+
+def to_json_value(value):
+    """Convert pandas and numpy values into plain JSON-serializable values."""
+    if isinstance(value, pd.Series):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, dict):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def render_summary_png(summary, title, path):
+    """Render the Home and Products charts of one summary into a PNG file."""
+    draw_summary_figure(summary, title).savefig(path)
+    return path
+
+def draw_summary_figure(summary, title):
+    """Draw the Home and Products charts of one summary on an Agg figure."""
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    (ax_category, ax_gender), (ax_shipping, ax_top_items) = fig.subplots(2, 2)
+    category_counts = summary['category_counts']
+    ax_category.bar(range(len(category_counts)), category_counts.values, width=0.5,
+                    color=['skyblue', 'pink', 'lightgreen', 'lightcoral'], edgecolor='black')
+    ax_category.set_xticks(range(len(category_counts)))
+    ax_category.set_xticklabels(category_counts.index)
+    ax_category.set_ylabel('Popularity (%)')
+    ax_category.set_title('Popularity of Each Category')
+    gender_counts = summary['gender_counts']
+    if len(gender_counts):
+        ax_gender.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
+                      colors=['skyblue', 'pink'])
+    ax_gender.set_title('Frequency of Gender')
+    shipping_counts = summary['shipping_counts']
+    ax_shipping.plot(range(len(shipping_counts)), shipping_counts.values, marker='o', linestyle='',
+                     color='lightblue')
+    ax_shipping.set_xticks(range(len(shipping_counts)))
+    ax_shipping.set_xticklabels(shipping_counts.index)
+    ax_shipping.set_ylabel('Frequency')
+    ax_shipping.set_title('Shipping Type')
+    top_items = summary['top_items']
+    top_items_percentage = top_items / top_items.sum() * 100 if len(top_items) else top_items
+    ax_top_items.bar(range(len(top_items_percentage)), top_items_percentage.values, width=0.5,
+                     edgecolor='black')
+    ax_top_items.set_xticks(range(len(top_items_percentage)))
+    ax_top_items.set_xticklabels(top_items_percentage.index, rotation=45, ha='right')
+    ax_top_items.set_ylabel('Percentage of Purchases (%)')
+    ax_top_items.set_title('Top 10 Items Purchased')
+    fig.suptitle(title)
+    fig.tight_layout()
+    return fig
+
+class ReportEngine:
+    """Class for computing dashboard aggregates for many filter combinations at once."""
+    def __init__(self, model, dimensions=REPORT_DIMENSIONS, top_n=10):
+        """Initialize ReportEngine over the given filter dimensions."""
+        self.model = model
+        self.dimensions = tuple(dimensions)
+        self.top_n = top_n
+
+    def combinations(self):
+        """Return every combination of 'All' or a single value for each report dimension."""
+        values = [['All'] + list(self.model.cube.labels[dimension])
+                  for dimension in self.dimensions]
+        return list(itertools.product(*values))
+
+    def filters_for(self, combination):
+        """Translate a combination into the arguments of DashboardModel.filter_data."""
+        selected = dict(zip(self.dimensions, combination))
+        category = selected.get('Category', 'All')
+        size = selected.get('Size', 'All')
+        return ([] if category == 'All' else [category], [] if size == 'All' else [size],
+                selected.get('Location', 'All'), selected.get('Season', 'All'))
+
+    def item_details(self, combination):
+        """Compute the Products page insights of every item for a combination via the item index."""
+        rows = self.model.filter_rows(*self.filters_for(combination))
+        return self.model.item_index.all_details(rows)
+
+    def run(self):
+        """Compute the summary and item insights for every combination."""
+        entries = []
+        for combination in self.combinations():
+            entries.append({
+                'filters': dict(zip(self.dimensions, combination)),
+                'summary': self.model.summarize_filters(*self.filters_for(combination),
+                                                        top_n=self.top_n),
+                'items': self.item_details(combination),
+            })
+        return entries
+
+    def write(self, entries, output_directory, png=False, workers=None):
+        """Write the entries to report.json and, optionally, one PNG per combination in parallel."""
+        os.makedirs(output_directory, exist_ok=True)
+        report_path = os.path.join(output_directory, 'report.json')
+        with open(report_path, 'w', encoding='utf-8') as report_file:
+            json.dump(to_json_value({'dimensions': list(self.dimensions), 'entries': entries}),
+                      report_file, indent=2)
+        if not png:
+            return [report_path]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for entry in entries:
+                name = '_'.join(str(value) for value in entry['filters'].values()).replace(' ', '_')
+                title = ', '.join(f'{key}: {value}' for key, value in entry['filters'].items())
+                futures.append(pool.submit(render_summary_png, entry['summary'], title,
+                                           os.path.join(output_directory, f'{name}.png')))
+            return [report_path] + [future.result() for future in futures]
+
+def main(argv=None):
+    """Entry point of the headless report command."""
+    parser = argparse.ArgumentParser(
+        description='Compute ShopperTrends dashboard aggregates without a GUI.')
+    parser.add_argument('--dataset', help='CSV file, or folder of partition files, to load instead '
+                                          'of the bundled dataset.')
+    parser.add_argument('--where', nargs='+', default=[], metavar='COLUMN=VALUE',
+                        help='Only load and report the rows with one of these values, skipping '
+                             'partition files that cannot hold them.')
+    parser.add_argument('--output', default='reports',
+                        help='Directory to write report.json and PNGs into.')
+    parser.add_argument('--dimensions', nargs='+', choices=FILTER_COLUMNS,
+                        default=list(REPORT_DIMENSIONS),
+                        help='Filter columns to enumerate combinations over.')
+    parser.add_argument('--top-n', type=int, default=10, help='Number of top items per summary.')
+    parser.add_argument('--png', action='store_true',
+                        help='Also render one PNG of the charts per combination.')
+    parser.add_argument('--workers', type=int, default=None, help='Processes used to render PNGs.')
+    args = parser.parse_args(argv)
+    selections = {}
+    for condition in args.where:
+        column, separator, value = condition.partition('=')
+        if not separator:
+            parser.error(f'--where expects COLUMN=VALUE, got {condition}')
+        selections.setdefault(column, []).append(value)
+    engine = ReportEngine(DashboardModel(args.dataset, selections.items()), args.dimensions,
+                          args.top_n)
+    paths = engine.write(engine.run(), args.output, png=args.png, workers=args.workers)
+    print(f'Wrote {len(paths)} file(s) to {args.output}')
+
+if __name__ == "__main__":
+    main()
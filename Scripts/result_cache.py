@@ -0,0 +1,89 @@
+"""
+result_cache.py: Module for caching query results keyed on the sidebar filter state.
+"""
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+
+def filter_key(category_filters, size_filters, location, season):
+    """Return a hashable, order-independent key for a filter state."""
+    return (tuple(sorted(category_filters)), tuple(sorted(size_filters)), location, season)
+
+def estimate_size(value):
+    """Roughly estimate the memory held by a cached value in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Class for a bounded least-recently-used cache of query results."""
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024):
+        """Initialize ResultCache with entry and memory limits."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.epoch = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for a key, or None on a miss."""
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for a key, computing and storing it on a miss."""
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+            self.misses += 1
+            epoch = self.epoch
+        value = compute()
+        self.put(key, value, epoch)
+        return value
+
+    def put(self, key, value, epoch=None):
+        """Store a value, evicting the least recently used entries to stay within the limits.
+
+        A value computed before the last clear (an older epoch) is not stored.
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        """Drop every cached entry, e.g. after the dataset is reloaded."""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            self.epoch += 1
+
+    def stats(self):
+        """Return the hit and miss counters along with the current occupancy."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                'bytes': self.total_bytes}
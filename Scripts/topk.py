@@ -0,0 +1,60 @@
+"""
+topk.py: Module for finding the most frequent items approximately in bounded memory.
+"""
+import heapq
+import pandas as pd
+
+class SpaceSavingTopK:
+    """Class for approximate top-K counting with the Space-Saving algorithm.
+
+    At most capacity counters are kept. A reported count never underestimates the true count
+    and overestimates it by at most total / capacity.
+    """
+    mode = 'Space-Saving'
+
+    def __init__(self, capacity=1000):
+        """Initialize SpaceSavingTopK with a fixed number of counters."""
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.heap = []
+        self.total = 0
+
+    def update(self, counts):
+        """Add a mapping of item to count, replacing the smallest counter when all are in use."""
+        for item, count in counts.items():
+            count = int(count)
+            self.total += count
+            if item in self.counts:
+                self.counts[item] += count
+            elif len(self.counts) < self.capacity:
+                self.counts[item] = count
+                self.errors[item] = 0
+            else:
+                smallest = self.pop_smallest()
+                minimum = self.counts.pop(smallest)
+                del self.errors[smallest]
+                self.counts[item] = minimum + count
+                self.errors[item] = minimum
+            heapq.heappush(self.heap, (self.counts[item], item))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def pop_smallest(self):
+        """Return the item with the smallest counter, skipping outdated heap entries."""
+        while True:
+            count, item = heapq.heappop(self.heap)
+            if self.counts.get(item) == count:
+                return item
+
+    def top(self, k):
+        """Return the k largest counters, largest first."""
+        largest = heapq.nlargest(k, self.counts.items(), key=lambda pair: pair[1])
+        return pd.Series(dict(largest), dtype='int64', name='count')
+
+    def accuracy(self):
+        """Describe the error bound of the reported counts."""
+        return {'mode': self.mode, 'total': self.total, 'confidence': 1.0,
+                'max_error': (self.total // self.capacity if len(self.counts) >= self.capacity
+                              else 0)}
@@ -19,6 +19,7 @@ class DashboardUI:
         self.init_components()
         self.graph_manager = GraphManager(self.app, self.model, self.controller, self)
         self.page = HomePage(app, controller, model, self)
+        self.pages = {"Home": self.page}
 
     def init_components(self):
         """Initialize UI components."""
@@ -27,13 +28,21 @@ class DashboardUI:
 
     def switch_to_home_page(self):
         """Switch to the Home page."""
-        if self.current_page != "Home":
-            if self.page.graph_manager.middle_frame:
-                self.page.graph_manager.middle_frame.destroy()
-                self.page.graph_manager.bottom_frame.destroy()
-            self.page = HomePage(self.app, self.controller, self.model, self)
-            self.page.switch_to_page(self.current_page)
-            self.current_page = "Home"
+        self.switch_to_page("Home", HomePage)
+
+    def switch_to_page(self, page_name, page_class):
+        """Show a page, building it on its first visit and hiding the current one."""
+        if self.current_page == page_name:
+            return
+        self.page.hide()
+        if page_name in self.pages:
+            self.page = self.pages[page_name]
+            self.page.show()
+        else:
+            self.page = page_class(self.app, self.controller, self.model, self)
+            self.pages[page_name] = self.page
+        self.current_page = page_name
+        self.page.refresh_if_stale()
 
     def create_head_frame(self):
         """Create the header frame with logo and labels."""
@@ -48,20 +57,8 @@ class DashboardUI:
 
     def switch_to_products_page(self):
         """Switch to the Products page."""
-        if self.current_page != "Products":
-                if self.page.graph_manager.middle_frame:
-                    self.page.graph_manager.middle_frame.destroy()
-                    self.page.graph_manager.bottom_frame.destroy()
-                self.page = ProductsPage(self.app, self.controller, self.model, self)
-                self.page.switch_to_page(self.current_page)
-                self.current_page = "Products"
+        self.switch_to_page("Products", ProductsPage)
 
     def switch_to_attribute_exploerer_page(self):
         """Switch to the Attribute Explorer page."""
-        if self.current_page != "Attribute_Explorer":
-                if self.page.graph_manager.middle_frame:
-                    self.page.graph_manager.middle_frame.destroy()
-                    self.page.graph_manager.bottom_frame.destroy()
-                self.page = Attribute_ExplorerPage(self.app, self.controller, self.model, self)
-                self.page.switch_to_page(self.current_page)
-                self.current_page = "Attribute_Exploerer"
+        self.switch_to_page("Attribute_Explorer", Attribute_ExplorerPage)
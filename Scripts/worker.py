@@ -0,0 +1,73 @@
+"""
+worker.py: Module for running data work off the Tk main thread.
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+from metrics import metrics
+
+POLL_MS = 30
+
+class ComputeExecutor:
+    """Class for running computations on a thread pool and delivering results on the Tk thread."""
+    def __init__(self, app, on_busy_change=None, max_workers=2):
+        """Initialize ComputeExecutor for the given tkinter application."""
+        self.app = app
+        self.on_busy_change = on_busy_change
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='compute')
+        self.results = queue.Queue()
+        self.generations = {}
+        self.pending = 0
+        self.polling = None
+
+    def submit(self, channel, compute, callback):
+        """Run compute in the background and pass its result to callback on the Tk thread.
+
+        Only the most recent submission on a channel is delivered; results of earlier
+        submissions on the same channel are discarded as stale.
+        """
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        self.pending += 1
+        if self.pending == 1 and self.on_busy_change:
+            self.on_busy_change(True)
+        self.pool.submit(self.run, channel, generation, compute, callback)
+        if self.polling is None:
+            self.polling = self.app.after(POLL_MS, self.poll)
+
+    def run(self, channel, generation, compute, callback):
+        """Run a computation on a worker thread and queue its outcome."""
+        try:
+            with metrics.span(f'compute.{channel}'):
+                result = compute()
+            self.results.put((channel, generation, callback, result, None))
+        except Exception as error:  # pylint: disable=broad-except
+            self.results.put((channel, generation, callback, None, error))
+
+    def poll(self):
+        """Deliver finished results that are still current and keep polling while work remains."""
+        self.polling = None
+        while True:
+            try:
+                channel, generation, callback, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if generation != self.generations.get(channel):
+                continue
+            if error is not None:
+                messagebox.showerror("Error", f"Could not compute the requested data: {error}")
+            else:
+                with metrics.span(f'deliver.{channel}'):
+                    callback(result)
+        if self.pending:
+            self.polling = self.app.after(POLL_MS, self.poll)
+        elif self.on_busy_change:
+            self.on_busy_change(False)
+
+    def shutdown(self):
+        """Stop polling and release the worker threads."""
+        if self.polling is not None:
+            self.app.after_cancel(self.polling)
+            self.polling = None
+        self.pool.shutdown(wait=False)